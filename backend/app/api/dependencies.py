@@ -1,8 +1,29 @@
 from functools import lru_cache
-from app.services.gemini_service import GeminiService
+from app.services.admission import AdmissionController, build_admission_controller
+from app.services.conversation_store import ConversationStore, build_conversation_store
+from app.services.backend import SummarizationBackend, build_backend
+from app.services.health_probe import UpstreamHealthProbe, build_health_probe
 
 
 @lru_cache()
-def get_gemini_service() -> GeminiService:
-    """Dependency for Gemini service"""
-    return GeminiService()
+def get_summarization_backend() -> SummarizationBackend:
+    """Dependency for the summarization backend selected by LLM_BACKEND"""
+    return build_backend()
+
+
+@lru_cache()
+def get_conversation_store() -> ConversationStore:
+    """Dependency for the server-side conversation store"""
+    return build_conversation_store()
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    """Dependency for the per-worker admission controller"""
+    return build_admission_controller()
+
+
+@lru_cache()
+def get_health_probe() -> UpstreamHealthProbe:
+    """Dependency for the cached backend probe behind the readiness check"""
+    return build_health_probe(get_summarization_backend())
@@ -1,20 +1,97 @@
-import json
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
-from typing import AsyncGenerator
-from app.api.dependencies import get_gemini_service
-from app.services.gemini_service import GeminiService
-from app.schemas.chat import ChatRequest, ChatResponse, StreamingChatResponse
+from starlette.background import BackgroundTask
+from typing import AsyncGenerator, List, Literal, Optional, Tuple
+from app.api.dependencies import (
+    get_admission_controller,
+    get_conversation_store,
+    get_summarization_backend,
+)
+from app.schemas.chat import (
+    BatchChatRequest,
+    ChatMessage,
+    ChatRequest,
+    ChatResponse,
+    StreamingChatResponse,
+)
+from app.services.admission import AdmissionController, client_key
+from app.services.backend import SummarizationBackend
+from app.services.batch import run_batch
+from app.services.conversation_store import ConversationStore, truncate_history
+from app.services.upload import DocumentUpload, condense_sections
+from app.core import metrics, sse
+from app.core.config import settings
 from app.core.exceptions import GeminiServiceException
+from app.core.lifecycle import lifecycle
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
+def _http_exception(e: GeminiServiceException) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+
+
+def _truncate(messages: List[ChatMessage]) -> List[ChatMessage]:
+    return truncate_history(
+        messages,
+        max_messages=settings.CONVERSATION_MAX_HISTORY_MESSAGES,
+        max_chars=settings.CONVERSATION_MAX_HISTORY_CHARS,
+    )
+
+
+def _resolve_conversation(
+    request: ChatRequest, store: ConversationStore
+) -> Tuple[str, List[ChatMessage]]:
+    """Return the conversation id and bounded history for this turn.
+
+    A known ``conversation_id`` uses the stored history; otherwise the client-supplied
+    ``conversation_history`` seeds a new conversation.
+    """
+    history = store.get(request.conversation_id) if request.conversation_id else None
+    if history is None:
+        history = request.conversation_history
+    conversation_id = request.conversation_id or store.new_id()
+    return conversation_id, _truncate(history)
+
+
+def _record_turn(
+    store: ConversationStore,
+    conversation_id: str,
+    history: List[ChatMessage],
+    user_message: str,
+    reply: str,
+) -> None:
+    """Store the turn in the conversation history. The summary has already been
+    produced, so a turn that cannot be stored is logged instead of failing the
+    response; an empty reply is not stored, as history messages must have content."""
+    if not reply:
+        logger.warning(f"Empty reply, conversation {conversation_id} not updated")
+        return
+    try:
+        store.save(
+            conversation_id,
+            _truncate(
+                history
+                + [
+                    ChatMessage(role="user", content=user_message),
+                    ChatMessage(role="assistant", content=reply),
+                ]
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Failed to save conversation {conversation_id}: {str(e)}", exc_info=True)
+
+
 @router.post("/completions", response_model=ChatResponse)
 async def chat_completion(
-    request: ChatRequest, gemini_service: GeminiService = Depends(get_gemini_service)
+    request: ChatRequest,
+    http_request: Request,
+    backend: SummarizationBackend = Depends(get_summarization_backend),
+    conversation_store: ConversationStore = Depends(get_conversation_store),
+    admission: AdmissionController = Depends(get_admission_controller),
 ):
     """Get chat completion (non-streaming)"""
     try:
@@ -24,95 +101,298 @@ async def chat_completion(
                 detail="Use /chat/stream endpoint for streaming responses",
             )
 
-        result = await gemini_service.chat_completion(
-            user_message=request.message,
-            conversation_history=request.conversation_history,
-            model=request.model,
-            temperature=request.temperature,
-            max_tokens=request.max_tokens,
+        conversation_id, history = _resolve_conversation(request, conversation_store)
+
+        async with admission.slot(client_key(http_request)):
+            result = await backend.chat_completion(
+                user_message=request.message,
+                conversation_history=history,
+                model=request.model,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                use_cache=request.use_cache,
+                summarization_mode=request.summarization_mode,
+                content_type=request.content_type,
+            )
+
+        _record_turn(
+            conversation_store, conversation_id, history, request.message, result["content"]
         )
 
         return ChatResponse(
             response=result["content"],
             model=result["model"],
             usage=result["usage"],
+            conversation_id=conversation_id,
             message="Chat completion successful",
         )
 
     except GeminiServiceException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise _http_exception(e)
 
 
 @router.post("/stream")
 async def chat_completion_stream(
-    request: ChatRequest, gemini_service: GeminiService = Depends(get_gemini_service)
+    request: ChatRequest,
+    http_request: Request,
+    backend: SummarizationBackend = Depends(get_summarization_backend),
+    conversation_store: ConversationStore = Depends(get_conversation_store),
+    admission: AdmissionController = Depends(get_admission_controller),
 ):
     """Get streaming chat completion"""
     logger.info(f"Received streaming request: {request.message[:100]}...")
-    logger.debug(f"Request details: model={request.model}, temp={request.temperature}, max_tokens={request.max_tokens}")
+    logger.debug(
+        "Request details: model=%s, temp=%s, max_tokens=%s",
+        request.model,
+        request.temperature,
+        request.max_tokens,
+    )
     
     try:
+        # Reject unknown models before the stream starts so the client gets a real 400
+        if request.model and not backend.is_model_allowed(request.model):
+            raise HTTPException(
+                status_code=400, detail=f"Model '{request.model}' is not available"
+            )
 
-        async def generate_stream() -> AsyncGenerator[str, None]:
+        pacing_mode = request.pacing or settings.STREAMING_PACING_MODE
+        started_at = time.perf_counter()
+        conversation_id, history = _resolve_conversation(request, conversation_store)
+
+        async def generate_stream() -> AsyncGenerator[bytes, None]:
             logger.info("Starting generate_stream function")
             chunk_count = 0
+            first_byte_at = None
+            reply_parts: List[str] = []
+            sent_bytes = 0
+            stream_model = request.model or settings.GEMINI_MODEL
+            lifecycle.stream_started()
             try:
-                logger.info("Calling gemini_service.chat_completion_stream...")
-                async for chunk in gemini_service.chat_completion_stream(
+                logger.info("Calling backend.chat_completion_stream...")
+                async for chunk in backend.chat_completion_stream(
                     user_message=request.message,
-                    conversation_history=request.conversation_history,
+                    conversation_history=history,
                     model=request.model,
                     temperature=request.temperature,
                     max_tokens=request.max_tokens,
+                    pacing=pacing_mode,
+                    use_cache=request.use_cache,
+                    summarization_mode=request.summarization_mode,
+                    content_type=request.content_type,
                 ):
+                    if lifecycle.drain_expired():
+                        logger.warning(
+                            "Ending stream after %d chunks: shutdown drain timeout", chunk_count
+                        )
+                        yield sse.encode_error("Server is restarting, please retry", 503, 1)
+                        return
                     chunk_count += 1
-                    logger.debug(f"Received chunk #{chunk_count} from Gemini service: {chunk}")
-                    
-                    # Send Server-Sent Events format with proper SSE structure
-                    chunk_data = chunk.model_dump()
-                    sse_data = f"id: {chunk_count}\nevent: message\ndata: {json.dumps(chunk_data)}\n\n"
-                    logger.debug(f"Sending SSE data: {sse_data[:100]}...")
-                    yield sse_data
+                    if first_byte_at is None:
+                        first_byte_at = time.perf_counter()
+                    stream_model = chunk.model
+                    reply_parts.append(chunk.content)
+                    if chunk.is_complete:
+                        _record_turn(
+                            conversation_store,
+                            conversation_id,
+                            history,
+                            request.message,
+                            "".join(reply_parts),
+                        )
+                        # The final chunk and [DONE] are ready together: one write
+                        logger.info("Stream completed after %d chunks, sending [DONE]", chunk_count)
+                        event = sse.encode_complete(
+                            chunk_count, chunk.model, chunk.usage, conversation_id, chunk.content
+                        ) + sse.encode_done(chunk_count + 1)
+                    else:
+                        event = sse.encode_message(chunk_count, chunk.content, chunk.model)
+                    logger.debug("Sending SSE event #%d (%d bytes)", chunk_count, len(event))
+                    sent_bytes += len(event)
+                    yield event
 
                     if chunk.is_complete:
-                        logger.info(f"Stream completed after {chunk_count} chunks")
                         break
-
-                # Send end signal with proper SSE structure
-                logger.info("Sending [DONE] signal")
-                yield f"id: {chunk_count + 1}\nevent: done\ndata: [DONE]\n\n"
+                else:
+                    # Send end signal with proper SSE structure
+                    logger.info("Sending [DONE] signal")
+                    yield sse.encode_done(chunk_count + 1)
+                finished_at = time.perf_counter()
+                metrics.observe_stream(stream_model, chunk_count + 1, sent_bytes)
+                logger.info(
+                    "Stream timing: pacing=%s ttfb_ms=%.1f ttlb_ms=%.1f chunks=%d",
+                    pacing_mode,
+                    ((first_byte_at or finished_at) - started_at) * 1000,
+                    (finished_at - started_at) * 1000,
+                    chunk_count,
+                )
 
             except GeminiServiceException as e:
                 logger.error(f"Gemini service exception in streaming: {e.message}")
-                error_data = {
-                    "error": {"message": e.message, "status_code": e.status_code}
-                }
-                yield f"event: error\ndata: {json.dumps(error_data)}\n\n"
+                yield sse.encode_error(e.message, e.status_code, e.retry_after)
             except Exception as e:
                 logger.error(f"Unexpected streaming error: {str(e)}", exc_info=True)
-                error_data = {
-                    "error": {"message": "Streaming failed", "status_code": 500}
-                }
-                yield f"event: error\ndata: {json.dumps(error_data)}\n\n"
+                yield sse.encode_error("Streaming failed", 500)
+            finally:
+                slot.release()
+                lifecycle.stream_finished()
+
+        # Acquire before the 200 is sent so an overloaded server answers with 429/503
+        slot = await admission.acquire(client_key(http_request))
 
         logger.info("Creating StreamingResponse...")
+        events = generate_stream()
+        if settings.SSE_BATCH_MAX_BYTES > 0:
+            events = sse.batch_ready(events, settings.SSE_BATCH_MAX_BYTES)
         response = StreamingResponse(
-            generate_stream(),
+            events,
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache, no-store, must-revalidate",
                 "Pragma": "no-cache",
                 "Expires": "0",
-                "Connection": "keep-alive",
                 "Content-Type": "text/event-stream; charset=utf-8",
                 "Access-Control-Allow-Origin": "*",
                 "Access-Control-Allow-Headers": "Cache-Control",
                 "X-Accel-Buffering": "no",
+                "X-Conversation-ID": conversation_id,
             },
+            # Also releases the slot if the client disconnects before the body starts
+            background=BackgroundTask(slot.release),
         )
         logger.info("StreamingResponse created successfully")
         return response
 
+    except HTTPException:
+        raise
+    except GeminiServiceException as e:
+        raise _http_exception(e)
     except Exception as e:
         logger.error(f"Stream setup error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to initialize streaming")
+
+
+@router.post("/upload", response_model=ChatResponse)
+async def chat_completion_upload(
+    http_request: Request,
+    model: Optional[str] = Query(default=None, description="Gemini model to use"),
+    temperature: Optional[float] = Query(default=None, ge=0.0, le=2.0),
+    max_tokens: Optional[int] = Query(default=None, ge=1, le=4000),
+    use_cache: bool = Query(default=True),
+    content_type: Optional[
+        Literal["auto", "article", "meeting_notes", "email", "document"]
+    ] = Query(default=None, description="Kind of content, selects the prompt template"),
+    backend: SummarizationBackend = Depends(get_summarization_backend),
+    admission: AdmissionController = Depends(get_admission_controller),
+):
+    """Summarize an uploaded text, markdown or HTML document.
+
+    The body is read incrementally (``multipart/form-data`` with a ``file`` part, or
+    the raw document) and summaries of early sections start while the rest is still
+    arriving.
+    """
+    if model and not backend.is_model_allowed(model):
+        raise HTTPException(status_code=400, detail=f"Model '{model}' is not available")
+
+    upload = DocumentUpload(http_request, settings.UPLOAD_MAX_BYTES)
+    client = client_key(http_request)
+    try:
+        # Slots are held per upstream call, not while the body is still arriving
+        started_at = time.perf_counter()
+        message, section_count = await condense_sections(
+            backend,
+            upload.sections(settings.UPLOAD_SECTION_CHARS),
+            model,
+            temperature,
+            settings.MAP_REDUCE_CONCURRENCY,
+            settings.UPLOAD_MAX_SECTIONS,
+            lambda: admission.slot(client),
+        )
+        logger.info(
+            f"Upload of {upload.received_bytes} bytes read as {section_count} section(s) "
+            f"in {(time.perf_counter() - started_at) * 1000:.0f}ms"
+        )
+        async with admission.slot(client):
+            result = await backend.chat_completion(
+                user_message=message,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                use_cache=use_cache,
+                # Several sections were already condensed by the map step
+                summarization_mode="single" if section_count > 1 else None,
+                content_type=content_type,
+            )
+
+        return ChatResponse(
+            response=result["content"],
+            model=result["model"],
+            usage=result["usage"],
+            message=f"Summarized {section_count} section(s) of the uploaded document",
+        )
+
+    except GeminiServiceException as e:
+        raise _http_exception(e)
+
+
+@router.post("/batch")
+async def chat_completion_batch(
+    request: BatchChatRequest,
+    http_request: Request,
+    backend: SummarizationBackend = Depends(get_summarization_backend),
+    admission: AdmissionController = Depends(get_admission_controller),
+):
+    """Summarize many documents, streaming one NDJSON result line per item as it finishes"""
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds the maximum of {settings.BATCH_MAX_ITEMS} items",
+        )
+
+    concurrency = min(
+        request.concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY
+    )
+    if admission.per_client_max:
+        # Every in-flight item holds one of this client's admission slots
+        concurrency = min(concurrency, admission.per_client_max)
+    item_timeout = min(
+        request.item_timeout_seconds or settings.BATCH_ITEM_TIMEOUT_SECONDS,
+        settings.BATCH_ITEM_TIMEOUT_SECONDS,
+    )
+    logger.info(
+        f"Received batch request: {len(request.items)} items, "
+        f"concurrency={concurrency}, item_timeout={item_timeout}s"
+    )
+
+    async def generate_results() -> AsyncGenerator[str, None]:
+        async for result in run_batch(
+            backend,
+            request.items,
+            concurrency,
+            item_timeout,
+            admission=admission,
+            client=client_key(http_request),
+        ):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(
+        generate_results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/admission/stats")
+async def admission_stats(
+    admission: AdmissionController = Depends(get_admission_controller),
+):
+    """Admission control load and counters for this worker"""
+    return admission.get_stats()
+
+
+@router.get("/cache/stats")
+async def cache_stats(backend: SummarizationBackend = Depends(get_summarization_backend)):
+    """Response cache hit/miss counters for this worker"""
+    stats = backend.cache_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
@@ -1,5 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from app.api.dependencies import get_admission_controller, get_health_probe
 from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.services.admission import AdmissionController
 from app.schemas.common import HealthResponse
 
 router = APIRouter(tags=["health"])
@@ -17,9 +21,39 @@ async def health_check():
 
 
 @router.get("/health/ready")
-async def readiness_check():
-    """Readiness check for deployment"""
-    return {"status": "ready"}
+async def readiness_check(
+    admission: AdmissionController = Depends(get_admission_controller),
+):
+    """Readiness check for deployment.
+
+    Answers from cached state only: 503 while the worker warms up or drains, when
+    the background backend probe reports degraded, or when more than
+    READINESS_MAX_QUEUE_DEPTH requests wait for an admission slot.
+    """
+    if not lifecycle.ready:
+        status = "draining" if lifecycle.draining else "starting"
+        return JSONResponse(status_code=503, content={"status": status})
+
+    stats = admission.get_stats()
+    load = {
+        "active": stats["active"],
+        "queued": stats["queue_depth"],
+        "max_concurrent": stats["max_concurrent"],
+        "max_queue": stats["max_queue"],
+        "streams": lifecycle.active_streams,
+    }
+    # Created by the warm-up before the worker became ready, so this never builds it
+    upstream = get_health_probe().snapshot() if settings.HEALTH_PROBE_ENABLED else None
+
+    status = "ready"
+    if upstream is not None and upstream["healthy"] is False:
+        status = "degraded"
+    elif settings.READINESS_MAX_QUEUE_DEPTH and load["queued"] > settings.READINESS_MAX_QUEUE_DEPTH:
+        status = "overloaded"
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={"status": status, "upstream": upstream, "load": load},
+    )
 
 
 @router.get("/health/live")
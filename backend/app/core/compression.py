@@ -0,0 +1,161 @@
+import zlib
+from functools import lru_cache
+from typing import Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # br is only offered when the package is installed
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/json",
+        "application/x-ndjson",
+        "text/event-stream",
+        "text/html",
+        "text/markdown",
+        "text/plain",
+    }
+)
+
+
+@lru_cache(maxsize=256)
+def negotiate_encoding(accept_encoding: str, supported: Tuple[str, ...]) -> Optional[str]:
+    """Pick the first of ``supported`` (in server preference order) that the
+    ``Accept-Encoding`` header allows with the highest q-value, or None"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    """Incremental gzip or brotli encoder for one response body"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(mode=brotli.MODE_TEXT, quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress ``data``; unless ``final``, flush so the client can decode
+        everything written so far (one flush per SSE write)"""
+        if self.encoding == "br":
+            output = self._brotli.process(data) if data else b""
+            return output + (self._brotli.finish() if final else self._brotli.flush())
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating br/gzip for JSON and text responses.
+
+    Complete bodies are compressed when at least ``minimum_size`` bytes. Streamed
+    bodies (SSE, NDJSON) keep one compression context per response and are flushed
+    after every write, so each event batch reaches the client without waiting for
+    more output; set ``compress_streams=False`` to send them uncompressed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        compress_streams: bool = True,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.compress_streams = compress_streams
+        self.encodings: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def _compressible(self, message: Message) -> bool:
+        if message["status"] in (204, 206, 304):
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        return media_type in COMPRESSIBLE_TYPES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, self.encodings) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        # The start message is held back until the first body shows whether to compress
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, compressor
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                if self._compressible(message):
+                    start = message
+                    MutableHeaders(raw=start["headers"]).add_vary_header("Accept-Encoding")
+                else:
+                    await send(message)
+                return
+
+            if message_type != "http.response.body" or (start is None and compressor is None):
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                streaming = more_body
+                if (streaming and not self.compress_streams) or (
+                    not streaming and len(body) < self.minimum_size
+                ):
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                body = compressor.compress(body, final=not more_body)
+                if not more_body:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+            else:
+                body = compressor.compress(body, final=not more_body)
+
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
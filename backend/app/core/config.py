@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List, Union
+from typing import List, Optional, Union
 import json
 from dotenv import load_dotenv
 
@@ -47,18 +47,131 @@ class Settings(BaseSettings):
                 return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",") if origin.strip()]
         return self.ALLOWED_ORIGINS
 
+    @property
+    def gemini_allowed_models(self) -> List[str]:
+        """Parse GEMINI_ALLOWED_MODELS from a JSON string, comma-separated string or list"""
+        if isinstance(self.GEMINI_ALLOWED_MODELS, str):
+            try:
+                return json.loads(self.GEMINI_ALLOWED_MODELS)
+            except json.JSONDecodeError:
+                return [name.strip() for name in self.GEMINI_ALLOWED_MODELS.split(",") if name.strip()]
+        return self.GEMINI_ALLOWED_MODELS
+
+    # Summarization Backend
+    LLM_BACKEND: str = "gemini"  # gemini | stub (deterministic local output for load testing)
+    STUB_FIRST_TOKEN_LATENCY_MS: int = 200  # Stub delay before the first chunk
+    STUB_TOKENS_PER_SECOND: float = 50.0  # Stub output rate (0 = as fast as possible)
+    STUB_OUTPUT_TOKENS: int = 200  # Stub tokens per response (capped by max_tokens)
+    STUB_TOKENS_PER_CHUNK: int = 8  # Stub tokens per upstream chunk
+
     # Gemini Configuration
-    GEMINI_API_KEY: str
+    GEMINI_API_KEY: str = ""  # Required when LLM_BACKEND=gemini
     GEMINI_MODEL: str = "gemini-1.5-flash"
     GEMINI_MAX_TOKENS: int = 100000
     GEMINI_TEMPERATURE: float = 0.7
+    # Extra models clients may request via ChatRequest.model (GEMINI_MODEL is always allowed)
+    GEMINI_ALLOWED_MODELS: Union[List[str], str] = []
+    GEMINI_FAST_MODEL: Optional[str] = None  # Model for short inputs when no model is requested
+    GEMINI_FAST_MODEL_MAX_CHARS: int = 2000  # Inputs up to this size go to GEMINI_FAST_MODEL
+    GEMINI_INPUT_TOKEN_LIMIT: int = 1000000  # Pre-flight limit for prompt tokens
+    TOKEN_COUNT_CACHE_SIZE: int = 1024  # Cached count_tokens results
+    UPSTREAM_THREAD_POOL_SIZE: int = 64  # Worker threads for blocking Gemini SDK calls
+    GEMINI_WARMUP_ENABLED: bool = True  # count_tokens call at startup to open the upstream connection
+    GEMINI_WARMUP_TIMEOUT_SECONDS: float = 5.0
+
+    # Upstream Resilience
+    GEMINI_MAX_ATTEMPTS: int = 3  # Attempts per call for transient errors (1 disables retries)
+    GEMINI_RETRY_BACKOFF_BASE_MS: int = 250  # Full-jitter exponential backoff base
+    GEMINI_RETRY_BACKOFF_MAX_MS: int = 4000
+    GEMINI_CALL_TIMEOUT_SECONDS: float = 120.0  # Deadline for a non-streaming call, retries included
+    GEMINI_FIRST_TOKEN_TIMEOUT_SECONDS: float = 30.0  # Deadline for a stream's first chunk, retries included
+    GEMINI_STREAM_IDLE_TIMEOUT_SECONDS: float = 30.0  # Max gap between stream chunks
+    GEMINI_HEDGE_ENABLED: bool = False  # Fire a second call when the first is slower than the quantile
+    GEMINI_HEDGE_QUANTILE: float = 0.9  # Below the tail being cut, or the tail sets the threshold
+    GEMINI_HEDGE_MIN_DELAY_MS: int = 500  # Never hedge earlier than this
+    GEMINI_HEDGE_MAX_DELAY_MS: int = 5000  # Never wait longer than this before hedging
+    GEMINI_HEDGE_MIN_SAMPLES: int = 50  # Latency samples needed before hedging starts
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the circuit (0 disables)
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 30.0  # Time the circuit stays open before a trial call
     
     # Streaming Configuration
     STREAMING_CHUNK_SIZE: int = 2  # Words per chunk (optimized for word-by-word effect)
     STREAMING_DELAY_MS: int = 50   # Delay between chunks in milliseconds (human-like typing speed)
+    STREAMING_QUEUE_SIZE: int = 16  # Max upstream chunks buffered between the SDK thread and the event loop
+    STREAMING_PACING_MODE: str = "typed"  # passthrough | coalesce | typed
+    STREAMING_MAX_ADDED_LATENCY_MS: int = 2000  # Cap on total artificial delay per response in typed mode
+    STREAMING_COALESCE_BYTES: int = 256  # Flush threshold in bytes for coalesce mode
+    STREAMING_COALESCE_MS: int = 100  # Flush threshold in milliseconds for coalesce mode
+    SSE_BATCH_MAX_BYTES: int = 0  # Probe for SSE events that are ready together and join them into one write up to this size (0 = off)
+
+    # Response Compression (negotiated via Accept-Encoding)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 500  # Complete bodies smaller than this (bytes) are sent as is
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1 (fastest) - 9 (smallest)
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0 (fastest) - 11 (smallest); br needs the brotli package
+    COMPRESSION_STREAMS_ENABLED: bool = True  # Compress SSE/NDJSON streams, flushing after every write
+
+    # Response Cache Configuration
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 512  # In-process LRU size
+    CACHE_TTL_SECONDS: int = 3600
+    CACHE_SQLITE_PATH: Optional[str] = None  # Set to share cached summaries across workers
+
+    # Request Coalescing
+    SINGLE_FLIGHT_ENABLED: bool = True  # Identical in-flight requests share one Gemini call (per worker)
+
+    # Long Document (Map-Reduce) Summarization
+    SUMMARIZATION_MODE: str = "auto"  # auto | single | map_reduce
+    MAP_REDUCE_THRESHOLD_CHARS: int = 12000  # "auto" switches to map-reduce above this size
+    MAP_REDUCE_CHUNK_CHARS: int = 6000  # Target chunk size
+    MAP_REDUCE_MAX_CHUNKS: int = 16
+    MAP_REDUCE_CONCURRENCY: int = 4  # Chunk summaries running in parallel per request
+    MAP_REDUCE_CHUNK_MAX_TOKENS: int = 1024  # Output cap for each partial summary
+
+    # Document Uploads (POST /api/v1/chat/upload)
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024  # Raw request body limit
+    UPLOAD_SECTION_CHARS: int = 6000  # Sections are summarized as soon as they are complete
+    UPLOAD_MAX_SECTIONS: int = 64
+
+    # Batch Summarization
+    BATCH_MAX_ITEMS: int = 500
+    BATCH_CONCURRENCY: int = 8  # Default items processed in parallel per batch
+    BATCH_MAX_CONCURRENCY: int = 32  # Upper bound for a client-requested concurrency
+    BATCH_ITEM_TIMEOUT_SECONDS: float = 120.0  # Default and maximum per-item timeout
+
+    # Server-side Conversations
+    CONVERSATION_STORE_BACKEND: str = "memory"  # memory | sqlite
+    CONVERSATION_SQLITE_PATH: str = "conversations.db"
+    CONVERSATION_MAX_CONVERSATIONS: int = 1000  # LRU size of the in-memory store
+    CONVERSATION_TTL_SECONDS: int = 3600  # Idle conversations expire after this
+    CONVERSATION_MAX_HISTORY_MESSAGES: int = 20  # Most recent messages kept per conversation
+    CONVERSATION_MAX_HISTORY_CHARS: int = 60000  # Size budget for the history sent upstream
+
+    # Admission Control (per worker)
+    ADMISSION_MAX_CONCURRENT: int = 32  # Requests allowed to call Gemini at once
+    ADMISSION_MAX_QUEUE: int = 64  # Requests allowed to wait for a slot; beyond this 503
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10.0  # Max wait for a slot before 503
+    ADMISSION_PER_CLIENT_MAX: int = 0  # Admitted + queued requests per client (0 disables); set ADMISSION_CLIENT_HEADER behind a proxy
+    ADMISSION_CLIENT_HEADER: Optional[str] = None  # e.g. X-Forwarded-For behind a trusted proxy
+    ADMISSION_TRUSTED_PROXY_HOPS: int = 1  # Proxies appending to ADMISSION_CLIENT_HEADER; the client is this many entries from the right
+    UPSTREAM_RETRY_AFTER_SECONDS: int = 10  # Retry-After sent when Gemini itself returns 429
+
+    # Readiness Probe (GET /api/v1/health/ready)
+    HEALTH_PROBE_ENABLED: bool = True  # Probe the backend in the background and cache the result
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 30.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 5.0
+    HEALTH_PROBE_FAILURE_THRESHOLD: int = 2  # Consecutive failed probes before reporting degraded
+    READINESS_MAX_QUEUE_DEPTH: int = 32  # Report overloaded above this many queued requests (0 disables)
+
+    # Production Server (gunicorn -c gunicorn.conf.py)
+    SERVER_WORKERS: int = 0  # 0 = one worker per available CPU (cgroup quota aware)
+    SERVER_DRAIN_SECONDS: float = 20.0  # Time in-flight streams get to finish on shutdown
 
     # Logging
     LOG_LEVEL: str = "INFO"
 
+    # Metrics
+    METRICS_ENABLED: bool = True  # Prometheus metrics middleware and /metrics endpoint
+
 
 settings = Settings()
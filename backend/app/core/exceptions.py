@@ -2,6 +2,7 @@ from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +18,20 @@ class CustomHTTPException(HTTPException):
 class GeminiServiceException(Exception):
     """Exception raised by Gemini service operations"""
 
-    def __init__(self, message: str, status_code: int = 500):
+    def __init__(
+        self, message: str, status_code: int = 500, retry_after: Optional[int] = None
+    ):
         self.message = message
         self.status_code = status_code
+        self.retry_after = retry_after  # Seconds, sent as a Retry-After header
         super().__init__(self.message)
 
+    @property
+    def headers(self) -> Optional[Dict[str, str]]:
+        if self.retry_after is None:
+            return None
+        return {"Retry-After": str(self.retry_after)}
+
 
 async def custom_http_exception_handler(request: Request, exc: CustomHTTPException):
     """Handle custom HTTP exceptions"""
@@ -51,6 +61,7 @@ async def gemini_service_exception_handler(
                 "status_code": exc.status_code,
             }
         },
+        headers=exc.headers,
     )
 
 
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import signal
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Readiness and shutdown state of this worker process.
+
+    ``ready`` flips once the startup warm-up in ``lifespan`` has finished, so load
+    balancers keep traffic away from a cold worker. On shutdown ``begin_drain`` marks
+    the worker not ready and gives in-flight streams ``timeout`` seconds to finish;
+    streams check ``drain_expired`` between events and end with a retryable error
+    once the budget is spent instead of being cut off mid-response.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.startup_timings: Dict[str, float] = {}  # Seconds per warm-up phase
+        self.draining = False
+        self.active_streams = 0
+        self._drain_deadline: Optional[float] = None
+        self._idle: Optional[asyncio.Event] = None
+
+    def mark_ready(self) -> None:
+        self.ready = True
+
+    def begin_drain(self, timeout: float) -> None:
+        if self.draining:
+            return
+        self.ready = False
+        self.draining = True
+        self._drain_deadline = time.monotonic() + timeout
+        logger.info(
+            f"Draining: {self.active_streams} stream(s) in flight, allowing {timeout:g}s"
+        )
+
+    def drain_on_signals(self, timeout: float) -> None:
+        """Start draining as soon as the server is told to stop.
+
+        uvicorn only runs the lifespan shutdown after every connection has closed, so
+        the drain deadline has to be set from the stop signal itself. Wraps whatever
+        handlers the server installed for SIGTERM and SIGINT; the server restores its
+        own handlers when it exits. Must be called while the server is running, e.g.
+        from the lifespan startup.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return  # Signal handlers can only be set from the main thread
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                self.begin_drain(timeout)
+                previous(signum, frame)
+
+            signal.signal(sig, handler)
+
+    def drain_expired(self) -> bool:
+        return self._drain_deadline is not None and time.monotonic() >= self._drain_deadline
+
+    def stream_started(self) -> None:
+        self.active_streams += 1
+
+    def stream_finished(self) -> None:
+        self.active_streams -= 1
+        if self.active_streams == 0 and self._idle is not None:
+            self._idle.set()
+
+    async def wait_for_streams(self, timeout: float) -> int:
+        """Wait up to ``timeout`` seconds for in-flight streams to finish; returns how
+        many are still running"""
+        if self.active_streams:
+            self._idle = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._idle = None
+        return self.active_streams
+
+
+lifecycle = Lifecycle()
@@ -0,0 +1,256 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Pattern, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the last response byte is sent",
+    ["endpoint", "method", "status", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being processed",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_LATENCY = Histogram(
+    "gemini_upstream_duration_seconds",
+    "Duration of Gemini generate calls (until the last chunk for streams)",
+    ["endpoint", "model", "kind"],
+    buckets=LATENCY_BUCKETS,
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "gemini_time_to_first_token_seconds",
+    "Time from the streaming request until the first upstream chunk",
+    ["endpoint", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+SSE_CHUNKS = Histogram(
+    "sse_stream_events",
+    "SSE events sent per stream",
+    ["endpoint", "model"],
+    buckets=COUNT_BUCKETS,
+)
+SSE_BYTES = Histogram(
+    "sse_stream_bytes",
+    "SSE payload bytes sent per stream",
+    ["endpoint", "model"],
+    buckets=BYTES_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "response_cache_lookups_total",
+    "Response cache lookups by result",
+    ["endpoint", "model", "result"],
+)
+COALESCED_REQUESTS = Counter(
+    "gemini_coalesced_requests_total",
+    "Requests that joined an identical in-flight Gemini call instead of starting one",
+    ["endpoint", "model", "kind"],
+)
+ADMISSION_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Time requests spent waiting for an admission slot",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests rejected by admission control",
+    ["endpoint", "reason"],
+)
+ADMISSION_ACTIVE = Gauge(
+    "admission_active_requests",
+    "Requests holding an admission slot",
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for an admission slot",
+    multiprocess_mode="livesum",
+)
+UPSTREAM_RETRIES = Counter(
+    "gemini_upstream_retries_total",
+    "Gemini calls retried after a transient error",
+    ["model", "kind", "error"],
+)
+UPSTREAM_HEDGES = Counter(
+    "gemini_upstream_hedges_total",
+    "Hedged Gemini calls by outcome (fired, won)",
+    ["model", "kind", "outcome"],
+)
+CIRCUIT_STATE = Gauge(
+    "gemini_circuit_state",
+    "Gemini circuit breaker state (0 closed, 1 half-open, 2 open)",
+    multiprocess_mode="max",
+)
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+UPSTREAM_HEALTHY = Gauge(
+    "upstream_probe_healthy",
+    "Result of the last background backend probe (1 healthy, 0 degraded)",
+    multiprocess_mode="min",
+)
+STARTUP_PHASE = Gauge(
+    "app_startup_phase_seconds",
+    "Duration of each worker startup phase (sdk_import, backend_init, upstream_warmup, total)",
+    ["phase"],
+    multiprocess_mode="max",
+)
+
+# Per-request label holder. Child tasks (e.g. the streaming body task) copy the
+# context but share this dict, so labels set deep in the service are visible to
+# the middleware when the request finishes.
+_request_labels: ContextVar[Optional[dict]] = ContextVar("metrics_request_labels", default=None)
+
+
+def endpoint_label() -> str:
+    labels = _request_labels.get()
+    return labels["endpoint"] if labels else "background"
+
+
+def set_model_label(model: str) -> None:
+    """Record the resolved model for the current request's metrics"""
+    labels = _request_labels.get()
+    if labels is not None:
+        labels["model"] = model
+
+
+def observe_upstream(model: str, kind: str, seconds: float) -> None:
+    UPSTREAM_LATENCY.labels(endpoint_label(), model, kind).observe(seconds)
+
+
+def observe_time_to_first_token(model: str, seconds: float) -> None:
+    TIME_TO_FIRST_TOKEN.labels(endpoint_label(), model).observe(seconds)
+
+
+def observe_stream(model: str, events: int, payload_bytes: int) -> None:
+    endpoint = endpoint_label()
+    SSE_CHUNKS.labels(endpoint, model).observe(events)
+    SSE_BYTES.labels(endpoint, model).observe(payload_bytes)
+
+
+def record_cache_lookup(model: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(endpoint_label(), model, "hit" if hit else "miss").inc()
+
+
+def record_coalesced(model: str, kind: str) -> None:
+    COALESCED_REQUESTS.labels(endpoint_label(), model, kind).inc()
+
+
+def observe_admission_wait(seconds: float) -> None:
+    ADMISSION_WAIT.labels(endpoint_label()).observe(seconds)
+
+
+def record_admission_rejection(reason: str) -> None:
+    ADMISSION_REJECTIONS.labels(endpoint_label(), reason).inc()
+
+
+def set_admission_load(active: int, queued: int) -> None:
+    ADMISSION_ACTIVE.set(active)
+    ADMISSION_QUEUE_DEPTH.set(queued)
+
+
+def record_upstream_retry(model: str, kind: str, error: str) -> None:
+    UPSTREAM_RETRIES.labels(model, kind, error).inc()
+
+
+def record_upstream_hedge(model: str, kind: str, outcome: str) -> None:
+    UPSTREAM_HEDGES.labels(model, kind, outcome).inc()
+
+
+def set_circuit_state(state: str) -> None:
+    CIRCUIT_STATE.set(_CIRCUIT_STATES[state])
+
+
+def set_upstream_healthy(healthy: bool) -> None:
+    UPSTREAM_HEALTHY.set(1 if healthy else 0)
+
+
+def set_startup_phase(phase: str, seconds: float) -> None:
+    STARTUP_PHASE.labels(phase).set(seconds)
+
+
+def render_metrics() -> tuple:
+    """Return the exposition payload and content type, aggregating across worker
+    processes when PROMETHEUS_MULTIPROC_DIR is set"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight requests per route template"""
+
+    def __init__(self, app: ASGIApp, exclude_paths: tuple = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = exclude_paths
+        self._routes: Optional[List[Tuple[Pattern, str]]] = None
+
+    def _route_table(self, app) -> List[Tuple[Pattern, str]]:
+        """Flatten the app's routes (including included routers) into
+        ``(path_regex, path_format)`` pairs. Built once, on the first request."""
+        if self._routes is None:
+            table: List[Tuple[Pattern, str]] = []
+            pending = list(getattr(app, "routes", []))
+            while pending:
+                route = pending.pop(0)
+                if hasattr(route, "path_regex") and hasattr(route, "path_format"):
+                    table.append((route.path_regex, route.path_format))
+                elif hasattr(route, "effective_route_contexts"):
+                    # FastAPI's included routers expose their flattened routes
+                    pending.extend(route.effective_route_contexts())
+                elif hasattr(route, "routes"):
+                    pending.extend(route.routes)
+            self._routes = table
+        return self._routes
+
+    def _route_template(self, scope: Scope) -> str:
+        # Label by route template, never the raw path, to keep label cardinality bounded
+        for path_regex, path_format in self._route_table(scope["app"]):
+            if path_regex.match(scope["path"]):
+                return path_format
+        return "unmatched"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._route_template(scope)
+        labels = {"endpoint": endpoint, "model": ""}
+        token = _request_labels.set(labels)
+        status = {"code": 500}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        in_flight = REQUESTS_IN_FLIGHT.labels(endpoint)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(
+                endpoint, scope["method"], str(status["code"]), labels["model"]
+            ).observe(time.perf_counter() - started_at)
+            _request_labels.reset(token)
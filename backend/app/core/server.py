@@ -0,0 +1,18 @@
+from uvicorn_worker import UvicornWorker
+from app.core.config import settings
+
+
+class ProductionWorker(UvicornWorker):
+    """gunicorn worker running uvloop + httptools.
+
+    Stream draining starts from the lifespan (``lifecycle.drain_on_signals``), so
+    only the public ``CONFIG_KWARGS`` hook is used here.
+    """
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        # Streams get SERVER_DRAIN_SECONDS to finish, then a moment to send their
+        # closing event before uvicorn cancels what is left
+        "timeout_graceful_shutdown": int(settings.SERVER_DRAIN_SECONDS) + 5,
+    }
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Optional
+
+# Server-Sent Events encoding for the chat stream.
+#
+# Content events are the hot path (one per paced chunk), so they are rendered from a
+# precomputed per-model template instead of going through ``model_dump`` and
+# ``json.dumps``. The output is byte-for-byte what ``json.dumps`` produces for a
+# ``StreamingChatResponse`` content chunk, so clients see no difference.
+
+_DONE = b"id: %d\nevent: done\ndata: [DONE]\n\n"
+
+
+@lru_cache(maxsize=64)
+def _message_suffix(model: str) -> str:
+    return (
+        f', "is_complete": false, "model": {encode_basestring_ascii(model)}, '
+        '"usage": null, "conversation_id": null}\n\n'
+    )
+
+
+def encode_message(event_id: int, content: str, model: str) -> bytes:
+    """Encode one content chunk as an ``event: message``"""
+    return (
+        f'id: {event_id}\nevent: message\ndata: {{"content": '
+        f"{encode_basestring_ascii(content)}{_message_suffix(model)}"
+    ).encode("ascii")
+
+
+def encode_complete(
+    event_id: int,
+    model: str,
+    usage: Optional[Dict[str, Any]],
+    conversation_id: Optional[str],
+    content: str = "",
+) -> bytes:
+    """Encode the final ``is_complete`` chunk carrying usage and the conversation id"""
+    data = json.dumps(
+        {
+            "content": content,
+            "is_complete": True,
+            "model": model,
+            "usage": usage,
+            "conversation_id": conversation_id,
+        }
+    )
+    return f"id: {event_id}\nevent: message\ndata: {data}\n\n".encode("ascii")
+
+
+def encode_done(event_id: int) -> bytes:
+    """Encode the ``[DONE]`` end-of-stream signal"""
+    return _DONE % event_id
+
+
+def encode_error(message: str, status_code: int, retry_after: Optional[int] = None) -> bytes:
+    """Encode an in-stream ``event: error``"""
+    error: Dict[str, Any] = {"message": message, "status_code": status_code}
+    if retry_after is not None:
+        error["retry_after"] = retry_after
+    return f"event: error\ndata: {json.dumps({'error': error})}\n\n".encode("ascii")
+
+
+async def batch_ready(
+    events: AsyncIterator[bytes], max_bytes: int
+) -> AsyncGenerator[bytes, None]:
+    """Join events that are already available into a single write.
+
+    After each event the next one is requested and given a single loop iteration to
+    complete; events produced without waiting (cache replays, bursts from upstream,
+    the final chunk followed by ``[DONE]``) are concatenated up to ``max_bytes``,
+    while an event that has to wait ends the batch so nothing is delayed. A
+    ``max_bytes`` of 0 forwards events unchanged.
+    """
+    iterator = events.__aiter__()
+    if max_bytes <= 0:
+        async for event in iterator:
+            yield event
+        return
+
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            try:
+                if pending is None:
+                    event = await iterator.__anext__()
+                else:
+                    event = await pending
+                    pending = None
+            except StopAsyncIteration:
+                return
+
+            parts = [event]
+            size = len(event)
+            while size < max_bytes:
+                pending = asyncio.ensure_future(iterator.__anext__())
+                await asyncio.sleep(0)
+                # Still waiting, finished or failed: flush first, the outer loop awaits it
+                if not pending.done() or pending.exception() is not None:
+                    break
+                event = pending.result()
+                pending = None
+                parts.append(event)
+                size += len(event)
+
+            yield parts[0] if len(parts) == 1 else b"".join(parts)
+    finally:
+        if pending is not None:
+            # The consumer went away; stop the in-flight read and drop its outcome
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, Exception):
+                pass
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import AsyncGenerator, AsyncIterator, Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_SENTINEL = object()
+
+
+def _abort(source) -> None:
+    """Abort a blocking iterator from the event loop so the worker thread stops waiting
+    for its next item. gRPC streams (the SDK keeps them on ``_iterator``) support
+    ``cancel()``; HTTP responses and idle generators support ``close()``."""
+    for target in (source, getattr(source, "_iterator", None)):
+        for name in ("cancel", "close"):
+            method = getattr(target, name, None)
+            if callable(method):
+                try:
+                    method()
+                except Exception:  # e.g. a generator that is running in the worker
+                    pass
+
+
+async def iterate_in_thread(
+    iterable_factory: Callable[[], Iterable[T]],
+    maxsize: int = 16,
+    executor: Optional[Executor] = None,
+) -> AsyncGenerator[T, None]:
+    """Drive a blocking iterator in a worker thread and yield its items on the event loop.
+
+    The factory is called inside the worker thread, so both the initial (blocking)
+    request and every subsequent network read for the next item stay off the loop.
+    Items are handed over through a bounded ``asyncio.Queue``: a slow consumer applies
+    backpressure to the producer instead of buffering the whole upstream response.
+    Pass a dedicated ``executor`` for long-lived streams so they do not starve the
+    loop's default thread pool. When the consumer stops early the upstream iterator is
+    cancelled, which releases the worker thread instead of leaving it blocked until
+    the next item arrives.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    sources = []  # The iterable, once the factory has returned it
+
+    def put(item, error=None) -> None:
+        future = asyncio.run_coroutine_threadsafe(queue.put((item, error)), loop)
+        future.result()
+
+    def producer() -> None:
+        try:
+            source = iterable_factory()
+            sources.append(source)
+            if stop.is_set():
+                _abort(source)
+            for item in source:
+                if stop.is_set():
+                    break
+                put(item)
+        except BaseException as e:  # forwarded to the consumer
+            if not stop.is_set():
+                put(_SENTINEL, e)
+            return
+        if not stop.is_set():
+            put(_SENTINEL)
+
+    worker = loop.run_in_executor(executor, producer)
+    # Retrieve any late error so it is not reported as "never retrieved"
+    worker.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    exhausted = False
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _SENTINEL:
+                exhausted = True
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        stop.set()
+        if not exhausted:
+            for source in sources:
+                _abort(source)
+        # Unblock a producer that is waiting on a full queue so the thread can exit
+        while not queue.empty():
+            queue.get_nowait()
+
+
+async def iterate_with_idle_timeout(
+    iterator: AsyncIterator[T], timeout: float
+) -> AsyncGenerator[T, None]:
+    """Yield from ``iterator``, raising ``asyncio.TimeoutError`` when the next item takes
+    longer than ``timeout`` seconds. The pending read is cancelled, which also closes
+    an async generator source such as ``iterate_in_thread``."""
+    while True:
+        try:
+            item = await asyncio.wait_for(iterator.__anext__(), timeout)
+        except StopAsyncIteration:
+            return
+        yield item
@@ -1,11 +1,23 @@
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 import uvicorn
 
+from app.api.dependencies import (
+    get_admission_controller,
+    get_conversation_store,
+    get_health_probe,
+    get_summarization_backend,
+)
+from app.core import metrics
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.core.metrics import MetricsMiddleware, render_metrics
 from app.core.exceptions import (
     CustomHTTPException,
     GeminiServiceException,
@@ -14,6 +26,7 @@ from app.core.exceptions import (
     general_exception_handler,
 )
 from app.api.v1.router import api_router
+from app.services.backend import backend_class
 
 # Configure logging
 logging.basicConfig(
@@ -24,6 +37,62 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+WARM_UP_RETRY_MAX_SECONDS = 30.0  # Cap of the backoff between failed warm-up attempts
+
+
+async def _warm_up_once() -> None:
+    """Import and build the per-worker services and open upstream connections;
+    raises if any step fails"""
+    timings = lifecycle.startup_timings
+    timings.clear()
+    started_at = time.perf_counter()
+    # The SDK import and client construction block; keep them off the loop so
+    # liveness keeps answering. Under the gunicorn profile the import already
+    # happened in the master, so sdk_import is close to zero there.
+    await asyncio.to_thread(backend_class)
+    timings["sdk_import"] = time.perf_counter() - started_at
+
+    phase_started_at = time.perf_counter()
+    backend = await asyncio.to_thread(get_summarization_backend)
+    get_conversation_store()
+    get_admission_controller()
+    timings["backend_init"] = time.perf_counter() - phase_started_at
+
+    phase_started_at = time.perf_counter()
+    await backend.warm_up()
+    timings["upstream_warmup"] = time.perf_counter() - phase_started_at
+    timings["total"] = time.perf_counter() - started_at
+
+
+async def warm_up() -> None:
+    """Warm the worker up before it reports ready, retrying failed attempts with
+    capped exponential backoff so one upstream error during a deploy never leaves
+    the worker not ready for good. Phase timings go to the log and ``/metrics``."""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            await _warm_up_once()
+            break
+        except Exception as e:
+            delay = min(WARM_UP_RETRY_MAX_SECONDS, 2.0 ** (attempt - 1))
+            logger.error(
+                f"Warm-up attempt {attempt} failed, retrying in {delay:g}s: {e}", exc_info=True
+            )
+            await asyncio.sleep(delay)
+
+    timings = lifecycle.startup_timings
+    if settings.HEALTH_PROBE_ENABLED:
+        get_health_probe().start()
+    for phase, seconds in timings.items():
+        metrics.set_startup_phase(phase, seconds)
+    lifecycle.mark_ready()
+    logger.info(
+        "Warm-up finished, ready: "
+        + " ".join(f"{phase}_ms={seconds * 1000:.0f}" for phase, seconds in timings.items())
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
@@ -31,11 +100,22 @@ async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.PROJECT_NAME} v{settings.VERSION}")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     logger.info(f"Gemini Model: {settings.GEMINI_MODEL}")
+    lifecycle.drain_on_signals(settings.SERVER_DRAIN_SECONDS)
+    # Runs in the background so liveness answers while the worker warms up
+    warm_up_task = asyncio.create_task(warm_up())
 
     yield
 
     # Shutdown
     logger.info(f"Shutting down {settings.PROJECT_NAME}")
+    warm_up_task.cancel()
+    # Only stop a probe that warm-up created; building one here could fail again
+    if get_health_probe.cache_info().currsize:
+        await get_health_probe().stop()
+    lifecycle.begin_drain(settings.SERVER_DRAIN_SECONDS)
+    remaining = await lifecycle.wait_for_streams(settings.SERVER_DRAIN_SECONDS)
+    if remaining:
+        logger.warning(f"Shutting down with {remaining} stream(s) still open")
 
 
 # Create FastAPI application
@@ -63,6 +143,20 @@ if settings.ENVIRONMENT == "production":
         allowed_hosts=["*"],  # Configure with actual domains in production
     )
 
+# Add response compression (br/gzip negotiated per request)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        compress_streams=settings.COMPRESSION_STREAMS_ENABLED,
+    )
+
+# Add metrics middleware (outermost, so latency covers the whole stack)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Register exception handlers
 app.add_exception_handler(CustomHTTPException, custom_http_exception_handler)
 app.add_exception_handler(GeminiServiceException, gemini_service_exception_handler)
@@ -85,6 +179,16 @@ async def root():
     }
 
 
+# Prometheus metrics endpoint
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Prometheus metrics exposition"""
+        payload, content_type = render_metrics()
+        return Response(content=payload, media_type=content_type)
+
+
 # Debug endpoint for CORS configuration
 @app.get("/cors-debug")
 async def cors_debug():
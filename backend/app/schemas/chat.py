@@ -20,6 +20,11 @@ class ChatRequest(BaseModel):
     conversation_history: List[ChatMessage] = Field(
         default=[], description="Previous messages"
     )
+    conversation_id: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        description="Continue a server-side conversation; its stored history replaces conversation_history",
+    )
     model: Optional[str] = Field(default=None, description="Gemini model to use")
     temperature: Optional[float] = Field(
         default=None, ge=0.0, le=2.0, description="Response creativity"
@@ -28,6 +33,20 @@ class ChatRequest(BaseModel):
         default=None, ge=1, le=4000, description="Maximum response tokens"
     )
     stream: bool = Field(default=True, description="Enable streaming response")
+    pacing: Optional[Literal["passthrough", "coalesce", "typed"]] = Field(
+        default=None,
+        description="Streaming pacing mode (defaults to the server's STREAMING_PACING_MODE)",
+    )
+    use_cache: bool = Field(
+        default=True, description="Allow serving a previously generated summary"
+    )
+    summarization_mode: Optional[Literal["auto", "single", "map_reduce"]] = Field(
+        default=None,
+        description="Long-document handling (defaults to the server's SUMMARIZATION_MODE)",
+    )
+    content_type: Optional[
+        Literal["auto", "article", "meeting_notes", "email", "document"]
+    ] = Field(default=None, description="Kind of content, selects the prompt template")
 
 
 class ChatResponse(BaseResponse):
@@ -46,3 +65,56 @@ class StreamingChatResponse(BaseModel):
     is_complete: bool = False
     model: str
     usage: Optional[Dict[str, Any]] = None
+    conversation_id: Optional[str] = None
+
+
+class BatchChatItem(BaseModel):
+    """Single document in a batch summarization request"""
+
+    id: Optional[str] = Field(default=None, description="Client identifier echoed back in the result")
+    message: str = Field(..., min_length=1, max_length=50000, description="User message")
+    conversation_history: List[ChatMessage] = Field(
+        default=[], description="Previous messages"
+    )
+    model: Optional[str] = Field(default=None, description="Gemini model to use")
+    temperature: Optional[float] = Field(
+        default=None, ge=0.0, le=2.0, description="Response creativity"
+    )
+    max_tokens: Optional[int] = Field(
+        default=None, ge=1, le=4000, description="Maximum response tokens"
+    )
+    use_cache: bool = Field(
+        default=True, description="Allow serving a previously generated summary"
+    )
+    summarization_mode: Optional[Literal["auto", "single", "map_reduce"]] = Field(
+        default=None,
+        description="Long-document handling (defaults to the server's SUMMARIZATION_MODE)",
+    )
+    content_type: Optional[
+        Literal["auto", "article", "meeting_notes", "email", "document"]
+    ] = Field(default=None, description="Kind of content, selects the prompt template")
+
+
+class BatchChatRequest(BaseModel):
+    """Batch summarization request"""
+
+    items: List[BatchChatItem] = Field(..., min_length=1, description="Documents to summarize")
+    concurrency: Optional[int] = Field(
+        default=None, ge=1, description="Items processed in parallel (capped by the server)"
+    )
+    item_timeout_seconds: Optional[float] = Field(
+        default=None, gt=0, description="Per-item timeout (capped by the server)"
+    )
+
+
+class BatchItemResult(BaseModel):
+    """One NDJSON line of a batch response, emitted as soon as the item finishes"""
+
+    index: int
+    id: Optional[str] = None
+    success: bool
+    response: Optional[str] = None
+    model: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
+    error: Optional[Dict[str, Any]] = None
+    latency_ms: float
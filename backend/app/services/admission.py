@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+from starlette.requests import HTTPConnection
+from app.core import metrics
+from app.core.config import settings
+from app.core.exceptions import GeminiServiceException
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_AFTER_SECONDS = 60
+
+
+def client_key(connection: HTTPConnection) -> str:
+    """Identify the caller for per-client limits.
+
+    Uses ADMISSION_CLIENT_HEADER when configured, else the peer address. Values a
+    proxy appends (``X-Forwarded-For``) are read from the right: the entry
+    ADMISSION_TRUSTED_PROXY_HOPS from the end is the one our outermost trusted proxy
+    wrote. Anything left of it comes from the caller and could be rotated freely.
+    """
+    if settings.ADMISSION_CLIENT_HEADER:
+        value = connection.headers.get(settings.ADMISSION_CLIENT_HEADER)
+        hops = max(1, settings.ADMISSION_TRUSTED_PROXY_HOPS)
+        if value:
+            addresses = [address.strip() for address in value.split(",")]
+            # Fewer entries than trusted proxies: not set by them, so ignore it
+            if len(addresses) >= hops and addresses[-hops]:
+                return addresses[-hops]
+    return connection.client.host if connection.client else "unknown"
+
+
+class AdmissionSlot:
+    """A granted slot; ``release`` is idempotent so it can be called from several
+    cleanup paths (e.g. a stream generator and a response background task)"""
+
+    def __init__(self, controller: "AdmissionController", client: str):
+        self._controller = controller
+        self._client = client
+        self._acquired_at = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self._client, time.monotonic() - self._acquired_at)
+
+
+class AdmissionController:
+    """Global and per-client concurrency limiter with a bounded FIFO wait queue.
+
+    Requests beyond ``max_concurrent`` wait in a queue of at most ``max_queue``
+    entries for up to ``queue_timeout`` seconds. A full queue or an expired wait is
+    rejected with 503, and a client already holding ``per_client_max`` admitted or
+    queued requests is rejected with 429; both carry a Retry-After estimate.
+    All state is touched from the event loop only, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        per_client_max: int = 0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_client_max = per_client_max
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._per_client: Dict[str, int] = {}
+        # Moving average of how long a slot is held, used for Retry-After estimates
+        self._avg_hold_seconds = 1.0
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    def _publish_load(self) -> None:
+        metrics.set_admission_load(self._active, len(self._waiters))
+
+    def _retry_after(self, queued_ahead: int) -> int:
+        waves = (queued_ahead + 1) / max(1, self.max_concurrent)
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(self._avg_hold_seconds * waves)))
+
+    def _reject(self, client: str, message: str, status_code: int, reason: str) -> None:
+        self._leave(client)
+        self.stats["rejected"] += 1
+        metrics.record_admission_rejection(reason)
+        retry_after = self._retry_after(len(self._waiters))
+        logger.warning(f"Admission rejected ({reason}) for client {client}")
+        raise GeminiServiceException(message, status_code, retry_after=retry_after)
+
+    def _leave(self, client: str) -> None:
+        remaining = self._per_client.get(client, 0) - 1
+        if remaining > 0:
+            self._per_client[client] = remaining
+        else:
+            self._per_client.pop(client, None)
+
+    async def acquire(self, client: str) -> AdmissionSlot:
+        """Wait for a slot, raising GeminiServiceException (429/503) when rejected"""
+        self._per_client[client] = self._per_client.get(client, 0) + 1
+        if self.per_client_max and self._per_client[client] > self.per_client_max:
+            self._reject(
+                client,
+                f"Too many concurrent requests from this client (limit {self.per_client_max})",
+                429,
+                "client_limit",
+            )
+
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self.stats["admitted"] += 1
+            self._publish_load()
+            metrics.observe_admission_wait(0.0)
+            return AdmissionSlot(self, client)
+
+        if len(self._waiters) >= self.max_queue:
+            self._reject(client, "Server is at capacity, please retry later", 503, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        self._publish_load()
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self.stats["timed_out"] += 1
+                self._reject(
+                    client, "Timed out waiting for capacity, please retry later", 503, "queue_timeout"
+                )
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot that was already handed over
+            if waiter.done() and not waiter.cancelled():
+                self._release(client, 0.0)
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self._leave(client)
+            raise
+        finally:
+            self._publish_load()
+            metrics.observe_admission_wait(time.monotonic() - queued_at)
+
+        self.stats["admitted"] += 1
+        return AdmissionSlot(self, client)
+
+    def _release(self, client: str, held_seconds: float) -> None:
+        self._leave(client)
+        if held_seconds:
+            self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * held_seconds
+        # Hand the slot straight to the oldest waiter so arrivals cannot jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish_load()
+                return
+        self._active -= 1
+        self._publish_load()
+
+    @asynccontextmanager
+    async def slot(self, client: str) -> AsyncIterator[AdmissionSlot]:
+        admitted = await self.acquire(client)
+        try:
+            yield admitted
+        finally:
+            admitted.release()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Current load and lifetime admission counters"""
+        return {
+            **self.stats,
+            "active": self._active,
+            "queue_depth": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+
+def build_admission_controller() -> AdmissionController:
+    """Create the admission controller configured by ADMISSION_* settings"""
+    return AdmissionController(
+        max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        per_client_max=settings.ADMISSION_PER_CLIENT_MAX,
+    )
@@ -0,0 +1,99 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncGenerator, List, Optional, Type
+from app.core.config import settings
+from app.schemas.chat import ChatMessage, StreamingChatResponse
+
+logger = logging.getLogger(__name__)
+
+
+class SummarizationBackend(ABC):
+    """Interface the API layer depends on to produce summaries.
+
+    Implementations raise ``GeminiServiceException`` (with an HTTP status code) for
+    failures that should reach the client. A backend missing one of the abstract
+    methods fails when it is constructed, not on its first request.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def is_model_allowed(self, model: str) -> bool:
+        """Whether a client may request ``model`` explicitly"""
+
+    @abstractmethod
+    async def chat_completion(
+        self,
+        user_message: str,
+        conversation_history: List[ChatMessage] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        summarization_mode: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> dict:
+        """Return ``{"content", "model", "usage"}`` for one completed summary"""
+
+    @abstractmethod
+    def chat_completion_stream(
+        self,
+        user_message: str,
+        conversation_history: List[ChatMessage] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        pacing: Optional[str] = None,
+        use_cache: bool = True,
+        summarization_mode: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> AsyncGenerator[StreamingChatResponse, None]:
+        """Yield content chunks, then one ``is_complete`` chunk carrying the usage"""
+
+    @abstractmethod
+    async def summarize_section(
+        self,
+        text: str,
+        position: str,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """Return a partial summary of one section of a long document (the map step
+        of map-reduce); ``position`` reads like ``3 of 8``, or ``3`` when the total is
+        not known yet"""
+
+    def cache_stats(self) -> Optional[dict]:
+        """Response cache counters, or None when the backend has no cache"""
+        return None
+
+    async def warm_up(self) -> None:
+        """Open upstream connections before the worker reports ready"""
+
+    async def probe(self, timeout: float) -> None:
+        """Cheap upstream call for the readiness probe; raises when the upstream is
+        unreachable or rejects our credentials. ``timeout`` bounds the upstream
+        request itself, so a hung upstream does not keep a worker thread busy."""
+
+
+def backend_class() -> Type[SummarizationBackend]:
+    """Import the backend selected by ``LLM_BACKEND``.
+
+    Imported here rather than at module level so the API, health checks and the stub
+    backend load without the Gemini SDK; importing it takes most of a cold start.
+    """
+    if settings.LLM_BACKEND == "stub":
+        from app.services.stub_backend import StubBackend
+
+        return StubBackend
+
+    from app.services.gemini_service import GeminiService
+
+    return GeminiService
+
+
+def build_backend() -> SummarizationBackend:
+    """Create the backend selected by ``LLM_BACKEND``"""
+    backend = backend_class()()
+    if backend.name == "stub":
+        logger.info("Using the local stub summarization backend")
+    return backend
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, List, Optional
+from app.core.exceptions import GeminiServiceException
+from app.schemas.chat import BatchChatItem, BatchItemResult
+from app.services.admission import AdmissionController
+from app.services.backend import SummarizationBackend
+
+logger = logging.getLogger(__name__)
+
+
+async def _summarize(
+    backend: SummarizationBackend,
+    item: BatchChatItem,
+    admission: Optional[AdmissionController],
+    client: str,
+) -> dict:
+    if admission is None:
+        return await _chat_completion(backend, item)
+    async with admission.slot(client):
+        return await _chat_completion(backend, item)
+
+
+async def _chat_completion(backend: SummarizationBackend, item: BatchChatItem) -> dict:
+    return await backend.chat_completion(
+        user_message=item.message,
+        conversation_history=item.conversation_history,
+        model=item.model,
+        temperature=item.temperature,
+        max_tokens=item.max_tokens,
+        use_cache=item.use_cache,
+        summarization_mode=item.summarization_mode,
+        content_type=item.content_type,
+    )
+
+
+async def _run_item(
+    backend: SummarizationBackend,
+    index: int,
+    item: BatchChatItem,
+    timeout: float,
+    admission: Optional[AdmissionController] = None,
+    client: str = "",
+) -> BatchItemResult:
+    """Summarize one batch item, converting any failure into an inline error result.
+    The timeout includes time spent waiting for an admission slot."""
+    started_at = time.perf_counter()
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - started_at) * 1000, 1)
+
+    try:
+        result = await asyncio.wait_for(
+            _summarize(backend, item, admission, client), timeout=timeout
+        )
+        return BatchItemResult(
+            index=index,
+            id=item.id,
+            success=True,
+            response=result["content"],
+            model=result["model"],
+            usage=result["usage"],
+            latency_ms=elapsed_ms(),
+        )
+    except asyncio.TimeoutError:
+        error = {"message": f"Item timed out after {timeout:g}s", "status_code": 504}
+    except GeminiServiceException as e:
+        error = {"message": e.message, "status_code": e.status_code}
+        if e.retry_after is not None:
+            error["retry_after"] = e.retry_after
+    except Exception as e:
+        logger.error(f"Unexpected error in batch item {index}: {str(e)}", exc_info=True)
+        error = {"message": "Internal server error", "status_code": 500}
+
+    return BatchItemResult(
+        index=index, id=item.id, success=False, error=error, latency_ms=elapsed_ms()
+    )
+
+
+async def run_batch(
+    backend: SummarizationBackend,
+    items: List[BatchChatItem],
+    concurrency: int,
+    item_timeout: float,
+    admission: Optional[AdmissionController] = None,
+    client: str = "",
+) -> AsyncGenerator[BatchItemResult, None]:
+    """Summarize ``items`` with at most ``concurrency`` in flight, yielding results in
+    completion order. Each in-flight item holds an admission slot when ``admission``
+    is given. Workers are cancelled if the consumer stops early."""
+    pending: asyncio.Queue = asyncio.Queue()
+    for index, item in enumerate(items):
+        pending.put_nowait((index, item))
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        while True:
+            try:
+                index, item = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await results.put(
+                await _run_item(backend, index, item, item_timeout, admission, client)
+            )
+
+    workers = [
+        asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(items))))
+    ]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
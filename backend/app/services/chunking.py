@@ -0,0 +1,114 @@
+import math
+import re
+from typing import List
+
+# A new segment starts at every markdown heading and after every blank line
+_BLOCK_BOUNDARY = re.compile(r"\n[ \t]*\n+|\n(?=#{1,6}\s)")
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _split_oversized(block: str, max_chars: int) -> List[str]:
+    """Split a single block that exceeds ``max_chars`` on sentence, then word boundaries"""
+    pieces: List[str] = []
+    current: List[str] = []
+    size = 0
+    for sentence in _SENTENCE_BOUNDARY.split(block):
+        if len(sentence) > max_chars:
+            # Pathological sentence: fall back to fixed-width slices
+            pieces.extend(
+                sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars)
+            )
+            continue
+        if current and size + len(sentence) + 1 > max_chars:
+            pieces.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + 1
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_document(text: str, max_chars: int, max_chunks: int) -> List[str]:
+    """Split ``text`` into at most ``max_chunks`` chunks on heading/paragraph boundaries.
+
+    Blocks are packed greedily up to ``max_chars``. When that would produce more than
+    ``max_chunks`` chunks, the chunk size is raised so the document still fits.
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    target = max(max_chars, math.ceil(len(text) / max(1, max_chunks)))
+
+    blocks: List[str] = []
+    for block in _BLOCK_BOUNDARY.split(text):
+        block = block.strip()
+        if not block:
+            continue
+        if len(block) > target:
+            blocks.extend(_split_oversized(block, target))
+        else:
+            blocks.append(block)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for block in blocks:
+        if current and size + len(block) + 2 > target:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(block)
+        size += len(block) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+
+    # Greedy packing can still overshoot by a chunk or two; merge the smallest neighbours
+    while len(chunks) > max(1, max_chunks):
+        i = min(range(len(chunks) - 1), key=lambda j: len(chunks[j]) + len(chunks[j + 1]))
+        chunks[i:i + 2] = [f"{chunks[i]}\n\n{chunks[i + 1]}"]
+
+    return chunks
+
+
+class IncrementalChunker:
+    """Cut a text stream into chunks of at most ``max_chars`` as it arrives.
+
+    ``feed`` returns every chunk that is complete so far, so work on the start of a
+    document can begin before the rest has been received. Cuts prefer the last
+    heading/paragraph boundary, then the last sentence end, then the last whitespace
+    inside the window; only the unfinished tail is kept in memory.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max(1, max_chars)
+        self._buffer = ""
+
+    def _cut(self) -> int:
+        window = self._buffer[:self.max_chars]
+        for pattern in (_BLOCK_BOUNDARY, _SENTENCE_BOUNDARY, _WHITESPACE):
+            cut = None
+            for match in pattern.finditer(window):
+                if match.start() > 0:
+                    cut = match.start()
+            if cut is not None:
+                return cut
+        return self.max_chars
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        chunks: List[str] = []
+        # One more character is needed to know whether the window ends on a boundary
+        while len(self._buffer) > self.max_chars:
+            cut = self._cut()
+            chunk = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:].lstrip()
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+    def close(self) -> List[str]:
+        chunk = self._buffer.strip()
+        self._buffer = ""
+        return [chunk] if chunk else []
@@ -0,0 +1,129 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Optional
+from app.core.config import settings
+from app.schemas.chat import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+def truncate_history(
+    messages: List[ChatMessage], max_messages: int, max_chars: int
+) -> List[ChatMessage]:
+    """Keep the most recent messages that fit within both the count and size budget"""
+    kept: List[ChatMessage] = []
+    total_chars = 0
+    for message in reversed(messages[-max_messages:] if max_messages > 0 else []):
+        total_chars += len(message.content)
+        if kept and total_chars > max_chars:
+            break
+        kept.append(message)
+    kept.reverse()
+    return kept
+
+
+class ConversationStore(ABC):
+    """Server-side conversation history keyed by ``conversation_id``"""
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    @abstractmethod
+    def get(self, conversation_id: str) -> Optional[List[ChatMessage]]:
+        """Return the stored history, or None if unknown or expired"""
+
+    @abstractmethod
+    def save(self, conversation_id: str, messages: List[ChatMessage]) -> None:
+        """Replace the stored history for ``conversation_id``"""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Per-process store with LRU eviction and an idle TTL"""
+
+    def __init__(self, max_conversations: int, ttl_seconds: int):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self._conversations: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id: str) -> Optional[List[ChatMessage]]:
+        with self._lock:
+            entry = self._conversations.get(conversation_id)
+            if entry is None:
+                return None
+            expires_at, messages = entry
+            if expires_at <= time.time():
+                del self._conversations[conversation_id]
+                return None
+            self._conversations.move_to_end(conversation_id)
+            return list(messages)
+
+    def save(self, conversation_id: str, messages: List[ChatMessage]) -> None:
+        with self._lock:
+            self._conversations[conversation_id] = (
+                time.time() + self.ttl_seconds,
+                list(messages),
+            )
+            self._conversations.move_to_end(conversation_id)
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """SQLite-backed store shared by every worker on the host"""
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "id TEXT PRIMARY KEY, messages TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, conversation_id: str) -> Optional[List[ChatMessage]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT messages, expires_at FROM conversations WHERE id = ?",
+                (conversation_id,),
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return [ChatMessage(**message) for message in json.loads(row[0])]
+
+    def save(self, conversation_id: str, messages: List[ChatMessage]) -> None:
+        payload = json.dumps([message.model_dump() for message in messages])
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO conversations (id, messages, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    (conversation_id, payload, now + self.ttl_seconds),
+                )
+                self._db.execute("DELETE FROM conversations WHERE expires_at <= ?", (now,))
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist conversation {conversation_id}: {e}")
+
+
+def build_conversation_store() -> ConversationStore:
+    """Create the store selected by ``CONVERSATION_STORE_BACKEND``"""
+    if settings.CONVERSATION_STORE_BACKEND == "sqlite":
+        return SQLiteConversationStore(
+            path=settings.CONVERSATION_SQLITE_PATH,
+            ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+        )
+    return InMemoryConversationStore(
+        max_conversations=settings.CONVERSATION_MAX_CONVERSATIONS,
+        ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+    )
@@ -1,106 +1,373 @@
 import asyncio
+import functools
 import logging
-from typing import AsyncGenerator, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, AsyncIterator, List, Optional, Tuple, Union
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from app.core.config import settings
+from app.core import metrics
 from app.core.exceptions import GeminiServiceException
+from app.core.streaming import iterate_in_thread, iterate_with_idle_timeout
+from app.services.backend import SummarizationBackend
+from app.services.cache import ResponseCache
+from app.services.chunking import split_document
+from app.services.model_registry import ModelRegistry
+from app.services.resilience import build_resilience
+from app.services.single_flight import SingleFlight
+from app.services.prompts import (
+    PROMPT_TEMPLATES,
+    PromptTemplate,
+    get_template,
+    map_prompt,
+    reduce_message,
+)
+from app.services.tokens import TokenCounter, usage_from_metadata
+from app.services.pacing import pace_stream
 from app.schemas.chat import ChatMessage, StreamingChatResponse
 
 logger = logging.getLogger(__name__)
 
 
-class GeminiService:
+def _chunk_text(chunk) -> str:
+    """Text of a streamed chunk; chunks without parts (e.g. the final one) raise in the SDK"""
+    try:
+        return chunk.text or ""
+    except (AttributeError, ValueError):
+        return ""
+
+
+async def _unshared(items: AsyncIterator[Any]) -> AsyncGenerator[List[Any], None]:
+    """``SingleFlight.stream`` batches for a stream that is not shared"""
+    yield []
+    async for item in items:
+        yield [item]
+
+
+def _rate_limited(error: Exception) -> GeminiServiceException:
+    """Surface an upstream quota/rate-limit error as a 429 instead of a generic 500"""
+    logger.warning(f"Gemini rate limit exceeded: {str(error)}")
+    return GeminiServiceException(
+        "Gemini rate limit exceeded, please retry later",
+        429,
+        retry_after=settings.UPSTREAM_RETRY_AFTER_SECONDS,
+    )
+
+
+def _client_error(error: google_exceptions.ClientError) -> GeminiServiceException:
+    """Surface an upstream 4xx (invalid argument, permission denied, unknown model)
+    with its own status instead of a generic 500"""
+    status_code = error.code if isinstance(error.code, int) and 400 <= error.code < 500 else 400
+    logger.warning(f"Gemini rejected the request ({status_code}): {error.message}")
+    return GeminiServiceException(f"Gemini rejected the request: {error.message}", status_code)
+
+
+class GeminiService(SummarizationBackend):
     """Service for Google Gemini API interactions"""
 
+    name = "gemini"
+
     def __init__(self):
+        if not settings.GEMINI_API_KEY:
+            raise RuntimeError("GEMINI_API_KEY is required when LLM_BACKEND=gemini")
         genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        self.models = ModelRegistry(
+            default_model=settings.GEMINI_MODEL,
+            allowed_models=settings.gemini_allowed_models,
+            fast_model=settings.GEMINI_FAST_MODEL,
+            fast_model_max_chars=settings.GEMINI_FAST_MODEL_MAX_CHARS,
+        )
         self.default_model = settings.GEMINI_MODEL
         self.default_max_tokens = settings.GEMINI_MAX_TOKENS
         self.default_temperature = settings.GEMINI_TEMPERATURE
+        # Dedicated pool for blocking SDK calls; streams hold a thread for their whole duration
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.UPSTREAM_THREAD_POOL_SIZE,
+            thread_name_prefix="gemini",
+        )
+        self.cache = (
+            ResponseCache(
+                max_entries=settings.CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.CACHE_TTL_SECONDS,
+                sqlite_path=settings.CACHE_SQLITE_PATH,
+            )
+            if settings.CACHE_ENABLED
+            else None
+        )
+        self.token_counter = TokenCounter(
+            executor=self.executor, max_entries=settings.TOKEN_COUNT_CACHE_SIZE
+        )
+        self.resilience = build_resilience()
+        self.flights = SingleFlight() if settings.SINGLE_FLIGHT_ENABLED else None
+
+    def is_model_allowed(self, model: str) -> bool:
+        return self.models.is_allowed(model)
+
+    def cache_stats(self) -> Optional[dict]:
+        return self.cache.get_stats() if self.cache is not None else None
+
+    async def warm_up(self) -> None:
+        """Build the model objects for every prompt template and open the connection
+        with a ``count_tokens`` call, so the first request skips client construction
+        and the TLS handshake. A failed call is logged; requests still work without it."""
+        model_names = {self.default_model, self.models.fast_model} - {None}
+        for template in PROMPT_TEMPLATES.values():
+            for model_name in model_names:
+                self.models.get(model_name, template.system_instruction)
+        if not settings.GEMINI_WARMUP_ENABLED:
+            return
+
+        try:
+            await asyncio.wait_for(
+                self.probe(settings.GEMINI_WARMUP_TIMEOUT_SECONDS),
+                settings.GEMINI_WARMUP_TIMEOUT_SECONDS,
+            )
+        except Exception as e:
+            logger.warning(f"Gemini connection warm-up failed: {str(e) or type(e).__name__}")
+
+    async def probe(self, timeout: float) -> None:
+        """``count_tokens`` on the default model: authenticated and reaches Gemini, but
+        generates nothing and uses no generation quota"""
+        model = self.models.get(self.default_model, get_template().system_instruction)
+        loop = asyncio.get_running_loop()
+        # Cancelling the awaiting future cannot free the thread; the SDK timeout does
+        await loop.run_in_executor(
+            self.executor,
+            functools.partial(model.count_tokens, "health", request_options={"timeout": timeout}),
+        )
+
+    def _cache_lookup(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool,
+        system_instruction: str = "",
+    ) -> Tuple[Optional[str], Optional[dict]]:
+        """Return the cache key (None when caching is off) and any cached result"""
+        if not use_cache or self.cache is None:
+            return None, None
+        key = ResponseCache.make_key(
+            prompt, model, temperature, max_tokens, system_instruction
+        )
+        cached = self.cache.get(key)
+        metrics.record_cache_lookup(model, cached is not None)
+        return key, cached
+
+    @staticmethod
+    def _flight_key(
+        cache_key: Optional[str],
+        prompt: str,
+        model: str,
+        generation_config,
+        system_instruction: str,
+        summarization_mode: Optional[str],
+    ) -> str:
+        """Requests with the same key would send Gemini the same call. The
+        summarization mode is part of it, as it decides between one call and
+        map-reduce for the same prompt."""
+        key = cache_key or ResponseCache.make_key(
+            prompt,
+            model,
+            generation_config.temperature,
+            generation_config.max_output_tokens,
+            system_instruction,
+        )
+        return f"{summarization_mode or settings.SUMMARIZATION_MODE}:{key}"
 
     def _prepare_messages(
-        self, user_message: str, conversation_history: List[ChatMessage]
+        self,
+        user_message: str,
+        conversation_history: List[ChatMessage],
+        template: PromptTemplate,
     ) -> str:
-        """Prepare messages for Gemini API with markdown formatting instructions"""
-        
-        # System instruction for summary-focused responses with markdown formatting
-        markdown_instructions = """You are an AI summarization assistant that specializes in creating clear, concise summaries from text blocks. Your primary goal is to extract key information and present it in well-formatted markdown.
-
-**YOUR MAIN PURPOSE:**
-- Transform articles, meeting notes, emails, and documents into digestible summaries
-- Extract key points, main ideas, and actionable items
-- Present information in a structured, easy-to-read format
-
-**FORMATTING REQUIREMENTS:**
-- Use headings: # Main Summary, ## Key Points, ### Details, #### Action Items
-- Format text: **bold** for key terms, *italic* for emphasis
-- Use `inline code` for technical terms, file names, or specific values
-- Create proper markdown lists with line breaks:
-  * Use "- " (dash + space) for bullet points, each on a new line
-  * Use "1. " (number + dot + space) for numbered lists, each on a new line
-  * Always add blank lines before and after lists
-- Use > blockquotes for important quotes or critical information
-- Create tables with | headers | data | when organizing structured data
-- Add horizontal rules --- to separate major sections
-
-**CRITICAL LIST FORMATTING RULES:**
-- Each bullet point MUST start on a new line with "- " (dash + space)
-- Each numbered item MUST start on a new line with "1. ", "2. ", etc.
-- Never put multiple list items on the same line
-- Always add a blank line before and after any list
-- Example of CORRECT bullet formatting:
-
-## Key Points
-
-- First key point goes here with proper spacing
-- Second key point on its own line
-- Third key point also on its own line
-
-## Details
-
-1. First numbered item
-2. Second numbered item  
-3. Third numbered item
-
-**SUMMARY STRUCTURE:**
-1. **# Summary** - Start with a clear title describing the content type
-2. **## Key Points** - Extract 3-5 main takeaways using bullet points
-3. **## Details** - Provide supporting information in subsections as needed
-4. **## Action Items** (if applicable) - List any tasks, decisions, or next steps
-5. **## Conclusion** - Brief wrap-up of the most important information
-
-**CONTENT HANDLING:**
-- For **articles**: Focus on main arguments, findings, and conclusions
-- For **meeting notes**: Highlight decisions made, action items, and key discussions
-- For **emails**: Summarize purpose, requests, deadlines, and required responses
-- For **documents**: Extract core concepts, important data, and recommendations
-
-**FINAL FORMATTING REMINDER:**
-Always format your response using proper markdown syntax:
-- Start each bullet point with "- " on a new line
-- Add blank lines before and after lists
-- Use proper heading hierarchy (# ## ### ####)
-- Make text scannable and well-structured
-
-Now provide a well-formatted markdown summary of the following content:
-
-"""
-        
-        # Combine system instructions with conversation
-        full_conversation = markdown_instructions
-        
-        # Add conversation history
-        for msg in conversation_history:
-            if msg.role == "user":
-                full_conversation += f"\nUser: {msg.content}"
-            elif msg.role == "assistant":
-                full_conversation += f"\nAssistant: {msg.content}"
-        
-        # Add current user message
-        full_conversation += f"\nUser: {user_message}\nAssistant: "
-        
-        return full_conversation
+        """Render the conversation for Gemini; the markdown formatting instructions are
+        sent separately as the template's system instruction"""
+        return template.render(user_message, conversation_history)
+
+    def _use_map_reduce(self, user_message: str, mode: Optional[str]) -> bool:
+        """Decide whether a message goes through the chunked map-reduce pipeline"""
+        mode = mode or settings.SUMMARIZATION_MODE
+        if mode == "map_reduce":
+            return True
+        if mode == "auto":
+            return len(user_message) > settings.MAP_REDUCE_THRESHOLD_CHARS
+        return False
+
+    async def _generate(
+        self,
+        model_name: str,
+        prompt: str,
+        generation_config,
+        system_instruction: Optional[str] = None,
+        kind: str = "generate",
+    ):
+        """Run a non-streaming generate call in the SDK thread pool, with retries,
+        hedging and the call deadline applied by the resilience layer"""
+        model = self.models.get(model_name, system_instruction)
+        loop = asyncio.get_running_loop()
+
+        def attempt(timeout: float):
+            # The request timeout also frees the worker thread of an abandoned attempt
+            return loop.run_in_executor(
+                self.executor,
+                lambda: model.generate_content(
+                    prompt,
+                    generation_config=generation_config,
+                    request_options={"timeout": timeout},
+                ),
+            )
+
+        started_at = time.perf_counter()
+        try:
+            return await self.resilience.call(
+                attempt, model_name, kind, settings.GEMINI_CALL_TIMEOUT_SECONDS
+            )
+        finally:
+            metrics.observe_upstream(model_name, kind, time.perf_counter() - started_at)
+
+    async def _generate_text(
+        self,
+        model_name: str,
+        prompt: str,
+        generation_config,
+        system_instruction: Optional[str] = None,
+        kind: str = "generate",
+    ) -> str:
+        response = await self._generate(
+            model_name, prompt, generation_config, system_instruction, kind
+        )
+        return response.text
+
+    async def _fits_input_window(
+        self, model_name: str, system_instruction: str, prompt: str
+    ) -> bool:
+        """Pre-flight check against GEMINI_INPUT_TOKEN_LIMIT.
+
+        A token is never shorter than one character in practice, so prompts with fewer
+        characters than the limit pass without a count_tokens round trip.
+        """
+        limit = settings.GEMINI_INPUT_TOKEN_LIMIT
+        if len(system_instruction) + len(prompt) <= limit:
+            return True
+        model = self.models.get(model_name, system_instruction)
+        return await self.token_counter.count(model, prompt) <= limit
+
+    async def _finalize_prompt(
+        self,
+        prompt: str,
+        user_message: str,
+        conversation_history: List[ChatMessage],
+        template: PromptTemplate,
+        model_name: str,
+        summarization_mode: Optional[str],
+        temperature: float,
+    ) -> str:
+        """Return the prompt to send upstream, running the map-reduce pipeline when it
+        is requested or when the prompt would not fit the model's input window"""
+        mode = summarization_mode or settings.SUMMARIZATION_MODE
+        use_map_reduce = self._use_map_reduce(user_message, mode)
+        too_large_message = (
+            f"Input exceeds the {settings.GEMINI_INPUT_TOKEN_LIMIT}-token limit of {model_name}"
+        )
+
+        if not use_map_reduce and not await self._fits_input_window(
+            model_name, template.system_instruction, prompt
+        ):
+            if mode == "single":
+                raise GeminiServiceException(too_large_message, 413)
+            logger.info("Prompt exceeds the input window, switching to map-reduce")
+            use_map_reduce = True
+
+        if not use_map_reduce:
+            return prompt
+
+        reduce_message = await self._map_reduce_message(model_name, user_message, temperature)
+        prompt = self._prepare_messages(reduce_message, conversation_history, template)
+        if not await self._fits_input_window(model_name, template.system_instruction, prompt):
+            raise GeminiServiceException(too_large_message, 413)
+        return prompt
+
+    async def _usage(
+        self,
+        metadata,
+        model_name: str,
+        system_instruction: str,
+        prompt: str,
+        completion: str,
+    ) -> dict:
+        """Usage from Gemini's usage metadata, falling back to cached count_tokens calls"""
+        usage = usage_from_metadata(metadata)
+        if usage is not None:
+            return usage
+        prompt_tokens, completion_tokens = await asyncio.gather(
+            self.token_counter.count(self.models.get(model_name, system_instruction), prompt),
+            self.token_counter.count(self.models.get(model_name), completion),
+        )
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def _map_reduce_message(
+        self, model_name: str, user_message: str, temperature: float
+    ) -> str:
+        """Summarize chunks of a long document concurrently (map) and return the
+        combined partial summaries to be used as the message for the final (reduce) call"""
+        chunks = split_document(
+            user_message,
+            max_chars=settings.MAP_REDUCE_CHUNK_CHARS,
+            max_chunks=settings.MAP_REDUCE_MAX_CHUNKS,
+        )
+        if len(chunks) <= 1:
+            return user_message
+
+        logger.info(
+            f"Map-reduce summarization: {len(chunks)} chunks, "
+            f"concurrency={settings.MAP_REDUCE_CONCURRENCY}"
+        )
+        semaphore = asyncio.Semaphore(settings.MAP_REDUCE_CONCURRENCY)
+
+        async def summarize_chunk(index: int, chunk: str) -> str:
+            async with semaphore:
+                return await self.summarize_section(
+                    chunk, f"{index + 1} of {len(chunks)}", model_name, temperature
+                )
+
+        partials = await asyncio.gather(
+            *(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks))
+        )
+        return reduce_message(partials)
+
+    async def summarize_section(
+        self,
+        text: str,
+        position: str,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """Partial summary of one section of a long document (the map step)"""
+        model_name = self.models.resolve(model, text)
+        map_config = genai.types.GenerationConfig(
+            temperature=temperature or self.default_temperature,
+            max_output_tokens=settings.MAP_REDUCE_CHUNK_MAX_TOKENS,
+        )
+        try:
+            return await self._generate_text(
+                model_name, map_prompt(position, text), map_config, kind="map"
+            )
+        except GeminiServiceException:
+            raise
+        except google_exceptions.TooManyRequests as e:
+            raise _rate_limited(e)
+        except google_exceptions.ClientError as e:
+            raise _client_error(e)
+        except Exception as e:
+            logger.error(f"Unexpected error summarizing section {position}: {str(e)}")
+            raise GeminiServiceException(f"Failed to summarize section: {str(e)}", 500)
 
     async def chat_completion(
         self,
@@ -109,33 +376,88 @@ Now provide a well-formatted markdown summary of the following content:
         model: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        summarization_mode: Optional[str] = None,
+        content_type: Optional[str] = None,
     ) -> dict:
         """Get chat completion from Gemini (non-streaming)"""
         try:
-            prompt = self._prepare_messages(user_message, conversation_history or [])
+            template = get_template(content_type)
+            prompt = self._prepare_messages(user_message, conversation_history or [], template)
+            current_model = self.models.resolve(model, user_message)
+            metrics.set_model_label(current_model)
             
             # Configure generation parameters
             generation_config = genai.types.GenerationConfig(
                 temperature=temperature or self.default_temperature,
                 max_output_tokens=max_tokens or self.default_max_tokens,
             )
-            
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+
+            cache_key, cached = self._cache_lookup(
                 prompt,
-                generation_config=generation_config
+                current_model,
+                generation_config.temperature,
+                generation_config.max_output_tokens,
+                use_cache,
+                template.system_instruction,
             )
+            if cached is not None:
+                logger.info("Serving chat completion from cache")
+                return cached
+
+            async def complete() -> dict:
+                final_prompt = await self._finalize_prompt(
+                    prompt,
+                    user_message,
+                    conversation_history or [],
+                    template,
+                    current_model,
+                    summarization_mode,
+                    generation_config.temperature,
+                )
+
+                response = await self._generate(
+                    current_model, final_prompt, generation_config, template.system_instruction
+                )
+                content = response.text
 
-            return {
-                "content": response.text,
-                "model": model or self.default_model,
-                "usage": {
-                    "prompt_tokens": len(prompt.split()),
-                    "completion_tokens": len(response.text.split()),
-                    "total_tokens": len(prompt.split()) + len(response.text.split()),
-                },
-            }
+                result = {
+                    "content": content,
+                    "model": current_model,
+                    "usage": await self._usage(
+                        getattr(response, "usage_metadata", None),
+                        current_model,
+                        template.system_instruction,
+                        final_prompt,
+                        content,
+                    ),
+                }
+                if cache_key is not None:
+                    self.cache.set(cache_key, result)
+                return result
+
+            if not use_cache or self.flights is None:
+                return await complete()
+            # Identical requests arriving while this one runs wait for the same call
+            return await self.flights.call(
+                self._flight_key(
+                    cache_key,
+                    prompt,
+                    current_model,
+                    generation_config,
+                    template.system_instruction,
+                    summarization_mode,
+                ),
+                complete,
+                current_model,
+            )
 
+        except GeminiServiceException:
+            raise
+        except google_exceptions.TooManyRequests as e:
+            raise _rate_limited(e)
+        except google_exceptions.ClientError as e:
+            raise _client_error(e)
         except Exception as e:
             logger.error(f"Unexpected error in chat_completion: {str(e)}")
             raise GeminiServiceException(f"Failed to get chat completion: {str(e)}", 500)
@@ -147,12 +469,17 @@ Now provide a well-formatted markdown summary of the following content:
         model: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        pacing: Optional[str] = None,
+        use_cache: bool = True,
+        summarization_mode: Optional[str] = None,
+        content_type: Optional[str] = None,
     ) -> AsyncGenerator[StreamingChatResponse, None]:
         """Get streaming chat completion from Gemini"""
         logger.info(f"Starting Gemini streaming for message: {user_message[:100]}...")
         
         try:
-            prompt = self._prepare_messages(user_message, conversation_history or [])
+            template = get_template(content_type)
+            prompt = self._prepare_messages(user_message, conversation_history or [], template)
             logger.debug(f"Prepared prompt length: {len(prompt)} characters")
             
             # Configure generation parameters
@@ -162,77 +489,206 @@ Now provide a well-formatted markdown summary of the following content:
             )
             logger.debug(f"Generation config: temp={generation_config.temperature}, max_tokens={generation_config.max_output_tokens}")
             
-            current_model = model or self.default_model
+            current_model = self.models.resolve(model, user_message)
+            metrics.set_model_label(current_model)
             logger.info(f"Using model: {current_model}")
-            
-            # Generate content with streaming
-            logger.info("Creating Gemini streaming response...")
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+
+            cache_key, cached = self._cache_lookup(
                 prompt,
-                generation_config=generation_config,
-                stream=True
+                current_model,
+                generation_config.temperature,
+                generation_config.max_output_tokens,
+                use_cache,
+                template.system_instruction,
             )
-            
-            full_content = ""
-            chunk_count = 0
-            
-            logger.info("Starting to iterate through response chunks...")
-            for chunk in response:
-                chunk_count += 1
-                logger.debug(f"Processing chunk #{chunk_count}")
-                
-                if hasattr(chunk, 'text') and chunk.text:
-                    content = chunk.text
-                    full_content += content
-                    logger.debug(f"Chunk content: '{content[:50]}...' (length: {len(content)})")
-                    
-                    # Break content into smaller pieces for word-by-word effect
-                    words = content.split(' ')
-                    current_word_chunk = ""
-                    words_in_chunk = 0
-                    
-                    for i, word in enumerate(words):
-                        current_word_chunk += word
-                        words_in_chunk += 1
-                        
-                        # Add space after word (except for last word)
-                        if i < len(words) - 1:
-                            current_word_chunk += " "
-                        
-                        # Send chunk when we reach desired chunk size or last word
-                        if words_in_chunk >= settings.STREAMING_CHUNK_SIZE or i == len(words) - 1:
-                            delay_seconds = settings.STREAMING_DELAY_MS / 1000.0
-                            
-                            response_obj = StreamingChatResponse(
-                                content=current_word_chunk,
-                                is_complete=False,
-                                model=current_model
-                            )
-                            logger.debug(f"Yielding word chunk ({words_in_chunk} words): '{current_word_chunk}'")
-                            yield response_obj
-                            await asyncio.sleep(delay_seconds)
-                            current_word_chunk = ""
-                            words_in_chunk = 0
-                else:
-                    logger.warning(f"Chunk #{chunk_count} has no text content")
-            
-            logger.info(f"Streaming completed. Total chunks: {chunk_count}, Total content length: {len(full_content)}")
-            
+            if cached is not None:
+                # Replay the stored summary at once; pacing only applies to live output
+                logger.info("Serving streaming chat completion from cache")
+                yield StreamingChatResponse.model_construct(
+                    content=cached["content"],
+                    is_complete=False,
+                    model=cached["model"],
+                )
+                yield StreamingChatResponse(
+                    content="",
+                    is_complete=True,
+                    model=cached["model"],
+                    usage=cached["usage"],
+                )
+                return
+
+            async def upstream() -> AsyncGenerator[Union[str, dict], None]:
+                """Gemini's text chunks, then the result; one run serves every identical
+                stream in flight when coalescing is on"""
+                # For map-reduce the chunks are summarized up front and the reduce step streams
+                final_prompt = await self._finalize_prompt(
+                    prompt,
+                    user_message,
+                    conversation_history or [],
+                    template,
+                    current_model,
+                    summarization_mode,
+                    generation_config.temperature,
+                )
+
+                # Generate content with streaming; the request and every chunk read run
+                # in a worker thread so a slow upstream never blocks the event loop
+                logger.info("Creating Gemini streaming response...")
+                stream_model = self.models.get(current_model, template.system_instruction)
+                stream_started_at = time.perf_counter()
+
+                async def open_stream(timeout: float):
+                    # An attempt succeeds once the first chunk arrives, so retries and
+                    # hedging only ever cover the time to first token
+                    stream = iterate_in_thread(
+                        lambda: stream_model.generate_content(
+                            final_prompt,
+                            generation_config=generation_config,
+                            stream=True,
+                        ),
+                        maxsize=settings.STREAMING_QUEUE_SIZE,
+                        executor=self.executor,
+                    )
+                    try:
+                        return stream, await stream.__anext__()
+                    except StopAsyncIteration:
+                        return stream, None
+
+                async def close_stream(opened) -> None:
+                    await opened[0].aclose()
+
+                response, first_chunk = await self.resilience.call(
+                    open_stream,
+                    current_model,
+                    "stream",
+                    settings.GEMINI_FIRST_TOKEN_TIMEOUT_SECONDS,
+                    discard=close_stream,
+                )
+                metrics.observe_time_to_first_token(
+                    current_model, time.perf_counter() - stream_started_at
+                )
+
+                async def upstream_chunks():
+                    if first_chunk is None:
+                        return
+                    yield first_chunk
+                    idle_timeout = settings.GEMINI_STREAM_IDLE_TIMEOUT_SECONDS
+                    try:
+                        async for chunk in iterate_with_idle_timeout(response, idle_timeout):
+                            yield chunk
+                    except asyncio.TimeoutError:
+                        raise GeminiServiceException(
+                            f"Gemini stream stalled for more than {idle_timeout:g}s", 504
+                        )
+
+                content_parts: List[str] = []
+                chunk_count = 0
+                usage_metadata = None
+                async for chunk in upstream_chunks():
+                    chunk_count += 1
+                    logger.debug("Processing chunk #%d", chunk_count)
+                    # Cumulative usage; the final chunk carries the complete counts
+                    usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
+
+                    text = _chunk_text(chunk)
+                    if text:
+                        content_parts.append(text)
+                        yield text
+                    else:
+                        logger.warning(f"Chunk #{chunk_count} has no text content")
+
+                metrics.observe_upstream(
+                    current_model, "stream", time.perf_counter() - stream_started_at
+                )
+                full_content = "".join(content_parts)
+                logger.info(f"Streaming completed. Total chunks: {chunk_count}, Total content length: {len(full_content)}")
+
+                result = {
+                    "content": full_content,
+                    "model": current_model,
+                    "usage": await self._usage(
+                        usage_metadata,
+                        current_model,
+                        template.system_instruction,
+                        final_prompt,
+                        full_content,
+                    ),
+                }
+                if cache_key is not None:
+                    self.cache.set(cache_key, result)
+                yield result
+
+            if use_cache and self.flights is not None:
+                batches = self.flights.stream(
+                    self._flight_key(
+                        cache_key,
+                        prompt,
+                        current_model,
+                        generation_config,
+                        template.system_instruction,
+                        summarization_mode,
+                    ),
+                    upstream,
+                    current_model,
+                )
+            else:
+                batches = _unshared(upstream())
+
+            result = None
+            pacing_mode = pacing or settings.STREAMING_PACING_MODE
+            try:
+                # A stream joined while under way first replays the output so far at
+                # once; pacing only applies to the live tail
+                replay = []
+                for item in await anext(batches):
+                    if isinstance(item, str):
+                        replay.append(item)
+                    else:
+                        result = item
+                if replay:
+                    logger.info("Joined an identical in-flight stream, replaying its output")
+                    yield StreamingChatResponse.model_construct(
+                        content="".join(replay),
+                        is_complete=False,
+                        model=current_model,
+                    )
+
+                async def live_text() -> AsyncGenerator[str, None]:
+                    nonlocal result
+                    async for batch in batches:
+                        for item in batch:
+                            if isinstance(item, str):
+                                yield item
+                            else:
+                                result = item
+
+                logger.info(f"Starting to iterate through response chunks (pacing={pacing_mode})...")
+                async for piece in pace_stream(live_text(), pacing_mode):
+                    # Built internally from validated fields, so skip pydantic validation
+                    yield StreamingChatResponse.model_construct(
+                        content=piece,
+                        is_complete=False,
+                        model=current_model,
+                    )
+            finally:
+                await batches.aclose()
+
             # Send completion signal
             completion_response = StreamingChatResponse(
                 content="",
                 is_complete=True,
                 model=current_model,
-                usage={
-                    "prompt_tokens": len(prompt.split()),
-                    "completion_tokens": len(full_content.split()),
-                    "total_tokens": len(prompt.split()) + len(full_content.split())
-                }
+                usage=result["usage"],
             )
             logger.info(f"Sending completion signal: {completion_response}")
             yield completion_response
 
+        except GeminiServiceException:
+            raise
+        except google_exceptions.TooManyRequests as e:
+            raise _rate_limited(e)
+        except google_exceptions.ClientError as e:
+            raise _client_error(e)
         except Exception as e:
             logger.error(f"Unexpected error in chat_completion_stream: {str(e)}", exc_info=True)
             raise GeminiServiceException(f"Failed to get streaming chat completion: {str(e)}", 500)
\ No newline at end of file
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from app.core import metrics
+from app.core.config import settings
+from app.services.backend import SummarizationBackend
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamHealthProbe:
+    """Probes the summarization backend on an interval and caches the outcome.
+
+    The readiness endpoint only reads the cached snapshot, so it answers in O(1)
+    and never waits on Gemini. The worker is reported degraded after
+    ``failure_threshold`` consecutive failed probes and healthy again after the
+    next success.
+    """
+
+    def __init__(
+        self,
+        backend: SummarizationBackend,
+        interval: float,
+        timeout: float,
+        failure_threshold: int = 2,
+    ):
+        self.backend = backend
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.healthy: Optional[bool] = None  # None until the first probe finishes
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_latency: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[asyncio.Future] = None  # Probe call, may outlive a check
+
+    async def check(self) -> bool:
+        """Run one probe and update the cached result.
+
+        A probe that timed out may still hold an upstream thread; until it returns,
+        checks count as failures without starting another call, so a hung upstream
+        never ties up more than one thread.
+        """
+        started_at = time.perf_counter()
+        try:
+            if self._pending is not None and not self._pending.done():
+                raise TimeoutError("Previous probe is still running")
+            self._pending = asyncio.ensure_future(self.backend.probe(self.timeout))
+            # Its outcome is dropped if it finishes after the check gave up on it
+            self._pending.add_done_callback(lambda f: f.cancelled() or f.exception())
+            await asyncio.wait_for(asyncio.shield(self._pending), self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.consecutive_failures += 1
+            self.last_error = str(e) or type(e).__name__
+            if self.consecutive_failures >= self.failure_threshold:
+                if self.healthy is not False:
+                    logger.warning(
+                        f"Backend probe failed {self.consecutive_failures} times, "
+                        f"reporting degraded: {self.last_error}"
+                    )
+                self.healthy = False
+            else:
+                logger.warning(f"Backend probe failed: {self.last_error}")
+        else:
+            if self.healthy is False:
+                logger.info("Backend probe succeeded, reporting healthy again")
+            self.healthy = True
+            self.consecutive_failures = 0
+            self.last_error = None
+        self.last_latency = time.perf_counter() - started_at
+        self.checked_at = time.time()
+        metrics.set_upstream_healthy(self.healthy is not False)
+        return self.healthy is not False
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._pending is not None:
+            self._pending.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cached probe result; never calls the backend"""
+        return {
+            "healthy": self.healthy,
+            "checked_at": self.checked_at,
+            "age_seconds": (
+                round(time.time() - self.checked_at, 1) if self.checked_at is not None else None
+            ),
+            "latency_ms": (
+                round(self.last_latency * 1000, 1) if self.last_latency is not None else None
+            ),
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.last_error,
+        }
+
+
+def build_health_probe(backend: SummarizationBackend) -> UpstreamHealthProbe:
+    """Create the backend probe configured by HEALTH_PROBE_* settings"""
+    return UpstreamHealthProbe(
+        backend,
+        interval=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+        timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+        failure_threshold=settings.HEALTH_PROBE_FAILURE_THRESHOLD,
+    )
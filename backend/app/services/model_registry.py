@@ -0,0 +1,66 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+import google.generativeai as genai
+from app.core.exceptions import GeminiServiceException
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Lazily builds and caches one ``GenerativeModel`` per model name and system instruction"""
+
+    def __init__(
+        self,
+        default_model: str,
+        allowed_models: List[str],
+        fast_model: Optional[str] = None,
+        fast_model_max_chars: int = 0,
+    ):
+        self.default_model = default_model
+        self.fast_model = fast_model
+        self.fast_model_max_chars = fast_model_max_chars
+        self.allowed_models = set(allowed_models) | {default_model}
+        if fast_model:
+            self.allowed_models.add(fast_model)
+        self._models: Dict[Tuple[str, Optional[str]], genai.GenerativeModel] = {}
+        self._lock = threading.Lock()
+
+    def is_allowed(self, name: str) -> bool:
+        return name in self.allowed_models
+
+    def resolve(self, requested: Optional[str], user_message: str) -> str:
+        """Pick the model for a request.
+
+        An explicit model must be on the allowlist. Without one, short inputs are routed
+        to the fast model (when configured) and everything else to the default model.
+        """
+        if requested:
+            if not self.is_allowed(requested):
+                raise GeminiServiceException(
+                    f"Model '{requested}' is not available. "
+                    f"Allowed models: {', '.join(sorted(self.allowed_models))}",
+                    400,
+                )
+            return requested
+        if self.fast_model and len(user_message) <= self.fast_model_max_chars:
+            return self.fast_model
+        return self.default_model
+
+    def get(
+        self, name: str, system_instruction: Optional[str] = None
+    ) -> genai.GenerativeModel:
+        """Return the cached model instance for ``name`` and ``system_instruction``,
+        building it on first use"""
+        key = (name, system_instruction)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    logger.info(f"Initializing Gemini model: {name}")
+                    model = genai.GenerativeModel(
+                        name, system_instruction=system_instruction
+                    )
+                    self._models[key] = model
+        return model
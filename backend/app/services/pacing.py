@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import AsyncGenerator, AsyncIterator, Literal, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PacingMode = Literal["passthrough", "coalesce", "typed"]
+PACING_MODES = ("passthrough", "coalesce", "typed")
+
+
+async def passthrough(chunks: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+    """Forward upstream chunks as soon as they arrive"""
+    async for text in chunks:
+        if text:
+            yield text
+
+
+async def coalesce(
+    chunks: AsyncIterator[str], max_bytes: int, max_delay_ms: int
+) -> AsyncGenerator[str, None]:
+    """Buffer upstream chunks and flush once the buffer reaches ``max_bytes`` or has
+    been held for ``max_delay_ms``, whichever comes first"""
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    buffer = []
+    buffered_bytes = 0
+    deadline = 0.0
+    pending: Optional[asyncio.Future] = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if not done:
+                # Time threshold reached while upstream is still producing
+                yield "".join(buffer)
+                buffer, buffered_bytes = [], 0
+                continue
+
+            try:
+                text = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+
+            if not text:
+                continue
+            if not buffer:
+                deadline = loop.time() + max_delay_ms / 1000.0
+            buffer.append(text)
+            buffered_bytes += len(text.encode("utf-8"))
+
+            if buffered_bytes >= max_bytes:
+                yield "".join(buffer)
+                buffer, buffered_bytes = [], 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def typed(
+    chunks: AsyncIterator[str],
+    words_per_chunk: int,
+    delay_ms: int,
+    max_added_latency_ms: int,
+) -> AsyncGenerator[str, None]:
+    """Split upstream chunks into small word groups with a delay between them for a
+    typing effect. The total artificial delay is capped at ``max_added_latency_ms``;
+    once the budget is spent the remaining text is forwarded without pauses."""
+    delay_seconds = delay_ms / 1000.0
+    budget = max_added_latency_ms / 1000.0
+
+    async for text in chunks:
+        if not text:
+            continue
+        if budget <= 0 or delay_seconds <= 0:
+            yield text
+            continue
+
+        words = text.split(" ")
+        for start in range(0, len(words), words_per_chunk):
+            if budget <= 0:
+                # Budget exhausted mid-chunk: flush the rest in one piece
+                yield " ".join(words[start:])
+                break
+
+            end = start + words_per_chunk
+            piece = " ".join(words[start:end])
+            if end < len(words):
+                piece += " "
+            yield piece
+
+            sleep_for = min(delay_seconds, budget)
+            budget -= sleep_for
+            await asyncio.sleep(sleep_for)
+
+
+def pace_stream(
+    chunks: AsyncIterator[str], mode: Optional[str] = None
+) -> AsyncGenerator[str, None]:
+    """Apply the requested pacing mode (or the configured default) to a text stream"""
+    mode = mode or settings.STREAMING_PACING_MODE
+    if mode == "passthrough":
+        return passthrough(chunks)
+    if mode == "coalesce":
+        return coalesce(
+            chunks,
+            max_bytes=settings.STREAMING_COALESCE_BYTES,
+            max_delay_ms=settings.STREAMING_COALESCE_MS,
+        )
+    if mode == "typed":
+        return typed(
+            chunks,
+            words_per_chunk=max(1, settings.STREAMING_CHUNK_SIZE),
+            delay_ms=settings.STREAMING_DELAY_MS,
+            max_added_latency_ms=settings.STREAMING_MAX_ADDED_LATENCY_MS,
+        )
+    raise ValueError(f"Unknown pacing mode: {mode}")
@@ -0,0 +1,160 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional
+from app.schemas.chat import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+ContentType = Literal["auto", "article", "meeting_notes", "email", "document"]
+
+# Shared markdown formatting rules; compiled into one system instruction per content type
+_INSTRUCTIONS_HEAD = """You are an AI summarization assistant that specializes in creating clear, concise summaries from text blocks. Your primary goal is to extract key information and present it in well-formatted markdown.
+
+**YOUR MAIN PURPOSE:**
+- Transform articles, meeting notes, emails, and documents into digestible summaries
+- Extract key points, main ideas, and actionable items
+- Present information in a structured, easy-to-read format
+
+**FORMATTING REQUIREMENTS:**
+- Use headings: # Main Summary, ## Key Points, ### Details, #### Action Items
+- Format text: **bold** for key terms, *italic* for emphasis
+- Use `inline code` for technical terms, file names, or specific values
+- Create proper markdown lists with line breaks:
+  * Use "- " (dash + space) for bullet points, each on a new line
+  * Use "1. " (number + dot + space) for numbered lists, each on a new line
+  * Always add blank lines before and after lists
+- Use > blockquotes for important quotes or critical information
+- Create tables with | headers | data | when organizing structured data
+- Add horizontal rules --- to separate major sections
+
+**CRITICAL LIST FORMATTING RULES:**
+- Each bullet point MUST start on a new line with "- " (dash + space)
+- Each numbered item MUST start on a new line with "1. ", "2. ", etc.
+- Never put multiple list items on the same line
+- Always add a blank line before and after any list
+- Example of CORRECT bullet formatting:
+
+## Key Points
+
+- First key point goes here with proper spacing
+- Second key point on its own line
+- Third key point also on its own line
+
+## Details
+
+1. First numbered item
+2. Second numbered item  
+3. Third numbered item
+
+**SUMMARY STRUCTURE:**
+1. **# Summary** - Start with a clear title describing the content type
+2. **## Key Points** - Extract 3-5 main takeaways using bullet points
+3. **## Details** - Provide supporting information in subsections as needed
+4. **## Action Items** (if applicable) - List any tasks, decisions, or next steps
+5. **## Conclusion** - Brief wrap-up of the most important information
+
+"""
+
+_INSTRUCTIONS_TAIL = """**FINAL FORMATTING REMINDER:**
+Always format your response using proper markdown syntax:
+- Start each bullet point with "- " on a new line
+- Add blank lines before and after lists
+- Use proper heading hierarchy (# ## ### ####)
+- Make text scannable and well-structured
+
+Provide a well-formatted markdown summary of the content in the user's latest message."""
+
+_CONTENT_HANDLING = {
+    "article": ("an article", "Focus on main arguments, findings, and conclusions"),
+    "meeting_notes": ("meeting notes", "Highlight decisions made, action items, and key discussions"),
+    "email": ("an email", "Summarize purpose, requests, deadlines, and required responses"),
+    "document": ("a document", "Extract core concepts, important data, and recommendations"),
+}
+
+_GENERIC_CONTENT_HANDLING = """**CONTENT HANDLING:**
+- For **articles**: Focus on main arguments, findings, and conclusions
+- For **meeting notes**: Highlight decisions made, action items, and key discussions
+- For **emails**: Summarize purpose, requests, deadlines, and required responses
+- For **documents**: Extract core concepts, important data, and recommendations
+
+"""
+
+_ROLE_PREFIXES = {"user": "\nUser: ", "assistant": "\nAssistant: "}
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A compiled prompt: a fixed system instruction plus a conversation renderer"""
+
+    content_type: str
+    system_instruction: str
+
+    def render(self, user_message: str, conversation_history: List[ChatMessage]) -> str:
+        """Render the conversation turns sent as user content.
+
+        Role prefixes and message bodies are collected as separate parts and joined
+        once, so each message is copied a single time.
+        """
+        parts = []
+        for msg in conversation_history:
+            prefix = _ROLE_PREFIXES.get(msg.role)
+            if prefix is not None:
+                parts.append(prefix)
+                parts.append(msg.content)
+        parts.append("\nUser: ")
+        parts.append(user_message)
+        parts.append("\nAssistant: ")
+        return "".join(parts)
+
+
+def _compile_templates() -> Dict[str, PromptTemplate]:
+    templates = {
+        "auto": PromptTemplate(
+            content_type="auto",
+            system_instruction=_INSTRUCTIONS_HEAD + _GENERIC_CONTENT_HANDLING + _INSTRUCTIONS_TAIL,
+        )
+    }
+    for content_type, (label, focus) in _CONTENT_HANDLING.items():
+        handling = f"**CONTENT HANDLING:**\nThe content is {label}. {focus}.\n\n"
+        templates[content_type] = PromptTemplate(
+            content_type=content_type,
+            system_instruction=_INSTRUCTIONS_HEAD + handling + _INSTRUCTIONS_TAIL,
+        )
+    logger.debug(f"Compiled {len(templates)} prompt templates")
+    return templates
+
+
+# Built once at import time; requests only render the conversation part
+PROMPT_TEMPLATES: Dict[str, PromptTemplate] = _compile_templates()
+
+
+def get_template(content_type: Optional[str] = None) -> PromptTemplate:
+    """Return the compiled template for ``content_type`` (``auto`` when unset)"""
+    return PROMPT_TEMPLATES.get(content_type or "auto", PROMPT_TEMPLATES["auto"])
+
+
+# Long documents are summarized in sections (map) and the partial summaries are then
+# combined into the message for one final call (reduce)
+_MAP_PROMPT = """You are summarizing section {position} of a longer document. Extract the key points, decisions, action items, names, figures and dates from this section as concise markdown bullet points. Do not add a title, introduction or conclusion.
+
+Section:
+
+{content}"""
+
+_REDUCE_MESSAGE = """The content below consists of notes extracted from {total} consecutive sections of one long document. Combine them into a single summary of the whole document, merging duplicate points and keeping the original order of topics.
+
+{sections}"""
+
+
+def map_prompt(position: str, content: str) -> str:
+    """Prompt for the partial summary of one section; ``position`` reads like ``3 of 8``
+    (or just ``3`` while the total is still unknown)"""
+    return _MAP_PROMPT.format(position=position, content=content)
+
+
+def reduce_message(partials: List[str]) -> str:
+    """Combine partial section summaries, in document order, into the final message"""
+    sections = "\n\n".join(
+        f"### Section {i + 1}\n{partial.strip()}" for i, partial in enumerate(partials)
+    )
+    return _REDUCE_MESSAGE.format(total=len(partials), sections=sections)
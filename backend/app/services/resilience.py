@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+from google.api_core import exceptions as google_exceptions
+from app.core import metrics
+from app.core.config import settings
+from app.core.exceptions import GeminiServiceException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Transient upstream failures worth another attempt; TooManyRequests also covers
+# gRPC ResourceExhausted. Our own per-attempt timeout surfaces as asyncio.TimeoutError.
+RETRYABLE_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.Aborted,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` retryable failures in a row the circuit opens and
+    calls fail fast with 503 for ``reset_seconds``. It then lets a single trial call
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        """Raise GeminiServiceException (503) while the circuit is open"""
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return
+        remaining = self.reset_seconds - (time.monotonic() - self._opened_at)
+        if self.state == self.OPEN and remaining <= 0:
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        raise GeminiServiceException(
+            "Gemini is temporarily unavailable, please retry later",
+            503,
+            retry_after=max(1, int(remaining + 0.999)),
+        )
+
+    def abandon(self) -> None:
+        """Forget a call that was cancelled before it had an outcome"""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_in_flight = False
+        if self.state != self.CLOSED:
+            logger.info("Circuit breaker closed")
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.failure_threshold <= 0:
+            return
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"Circuit breaker opened after {self._failures} consecutive failures"
+                )
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        metrics.set_circuit_state(state)
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies for one (kind, model) pair"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        if len(self._samples) < min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Resilience:
+    """Retries with jittered exponential backoff, an overall deadline per call,
+    optional hedging and a shared circuit breaker around upstream Gemini calls.
+
+    ``attempt`` is a coroutine function taking the remaining deadline in seconds and
+    returning the attempt's result; for streams it should return once the first
+    chunk has arrived so that hedging and retries only cover the time to first token.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        breaker: CircuitBreaker,
+        hedge_enabled: bool = False,
+        hedge_quantile: float = 0.9,
+        hedge_min_delay: float = 0.5,
+        hedge_max_delay: float = 5.0,
+        hedge_min_samples: int = 50,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self.hedge_enabled = hedge_enabled
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies: Dict[Tuple[str, str], LatencyTracker] = {}
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt`` (1-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _tracker(self, kind: str, model: str) -> LatencyTracker:
+        key = (kind, model)
+        if key not in self._latencies:
+            self._latencies[key] = LatencyTracker()
+        return self._latencies[key]
+
+    def hedge_delay(self, kind: str, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or the
+        latency history is still too short.
+
+        The quantile sits below the slow tail it is meant to cut (at p95 a 5% tail
+        sets the threshold itself), and is clamped so a noisy window can neither
+        hedge every call nor push the hedge past the point where it helps.
+        """
+        if not self.hedge_enabled:
+            return None
+        threshold = self._tracker(kind, model).quantile(
+            self.hedge_quantile, self.hedge_min_samples
+        )
+        if threshold is None:
+            return None
+        return min(max(threshold, self.hedge_min_delay), self.hedge_max_delay)
+
+    async def call(
+        self,
+        attempt: Callable[[float], Awaitable[T]],
+        model: str,
+        kind: str,
+        deadline: float,
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> T:
+        """Run ``attempt`` until it succeeds, a non-retryable error occurs, attempts
+        run out or ``deadline`` seconds have passed. ``discard`` cleans up the result
+        of a hedged attempt that finished second."""
+        expires_at = time.monotonic() + deadline
+        for number in range(1, self.max_attempts + 1):
+            self.breaker.before_call()
+            started_at = time.monotonic()
+            try:
+                result = await self._attempt(
+                    attempt, model, kind, expires_at - started_at, discard
+                )
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered (e.g. invalid argument), so it is healthy
+                    self.breaker.record_success()
+                    raise
+                if isinstance(e, google_exceptions.TooManyRequests):
+                    # Rate limiting is not an outage: back off and pass Retry-After on
+                    # instead of failing every caller fast
+                    self.breaker.abandon()
+                else:
+                    self.breaker.record_failure()
+                delay = self.backoff(number)
+                if number == self.max_attempts or time.monotonic() + delay >= expires_at:
+                    raise self._final_error(e, deadline)
+                logger.warning(
+                    f"Gemini {kind} attempt {number}/{self.max_attempts} failed "
+                    f"({type(e).__name__}), retrying in {delay:.2f}s"
+                )
+                metrics.record_upstream_retry(model, kind, type(e).__name__)
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            self._tracker(kind, model).add(time.monotonic() - started_at)
+            return result
+
+    async def _attempt(
+        self,
+        attempt: Callable[[float], Awaitable[T]],
+        model: str,
+        kind: str,
+        timeout: float,
+        discard: Optional[Callable[[T], Awaitable[None]]],
+    ) -> T:
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(attempt(timeout))
+        hedge_after = self.hedge_delay(kind, model)
+        if hedge_after is None or hedge_after >= timeout:
+            return await asyncio.wait_for(primary, timeout)
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        logger.info(f"Hedging Gemini {kind} call after {hedge_after:.2f}s")
+        metrics.record_upstream_hedge(model, kind, "fired")
+        hedge = asyncio.ensure_future(attempt(timeout - hedge_after))
+        pending = {primary, hedge}
+        winner: Optional[asyncio.Future] = None
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                remaining = timeout - (time.monotonic() - started_at)
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, remaining), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is hedge:
+                            metrics.record_upstream_hedge(model, kind, "won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The loser's worker thread cannot be interrupted; its result is dropped
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(primary, hedge, return_exceptions=True)
+            if discard is not None:
+                for task in (primary, hedge):
+                    if task is not winner and not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+
+    @staticmethod
+    def _final_error(error: Exception, deadline: float) -> Exception:
+        if isinstance(
+            error,
+            (asyncio.TimeoutError, google_exceptions.DeadlineExceeded, google_exceptions.GatewayTimeout),
+        ):
+            return GeminiServiceException(f"Gemini did not respond within {deadline:g}s", 504)
+        if isinstance(error, google_exceptions.TooManyRequests):
+            return error  # reported as 429 by the service
+        return GeminiServiceException(
+            f"Gemini is temporarily unavailable: {str(error)}",
+            503,
+            retry_after=settings.UPSTREAM_RETRY_AFTER_SECONDS,
+        )
+
+
+def build_resilience() -> Resilience:
+    """Create the resilience layer configured by GEMINI_RETRY_*, GEMINI_HEDGE_* and
+    CIRCUIT_BREAKER_* settings"""
+    return Resilience(
+        max_attempts=settings.GEMINI_MAX_ATTEMPTS,
+        backoff_base=settings.GEMINI_RETRY_BACKOFF_BASE_MS / 1000,
+        backoff_max=settings.GEMINI_RETRY_BACKOFF_MAX_MS / 1000,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            reset_seconds=settings.CIRCUIT_BREAKER_RESET_SECONDS,
+        ),
+        hedge_enabled=settings.GEMINI_HEDGE_ENABLED,
+        hedge_quantile=settings.GEMINI_HEDGE_QUANTILE,
+        hedge_min_delay=settings.GEMINI_HEDGE_MIN_DELAY_MS / 1000,
+        hedge_max_delay=settings.GEMINI_HEDGE_MAX_DELAY_MS / 1000,
+        hedge_min_samples=settings.GEMINI_HEDGE_MIN_SAMPLES,
+    )
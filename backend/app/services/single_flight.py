@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _Broadcast:
+    """Items of one upstream stream, kept so that late subscribers can replay them"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def changed(self) -> None:
+        await self._changed.wait()
+
+
+class SingleFlight:
+    """Shares one upstream call between identical requests that overlap in time.
+
+    The first request for a key starts the work in its own task; requests arriving
+    while it runs subscribe to the same outcome instead of starting another call.
+    Nothing is kept once the call finishes, so this only deduplicates concurrent
+    requests (the response cache covers repeats). The work is cancelled when every
+    subscriber has gone away, and keeps running while any of them is still waiting.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    async def call(self, key: str, fn: Callable[[], Awaitable[Any]], model: str) -> Any:
+        """Return the result of ``fn()``, or of the identical call already running"""
+        flight = self._calls.get(key)
+        if flight is None:
+            self.stats["calls"] += 1
+
+            async def run() -> Any:
+                try:
+                    return await fn()
+                finally:
+                    # Before the result is delivered, so later requests start afresh
+                    if self._calls.get(key) is flight:
+                        del self._calls[key]
+
+            flight = _Call(asyncio.ensure_future(run()))
+            self._calls[key] = flight
+        else:
+            self.stats["coalesced"] += 1
+            metrics.record_coalesced(model, "generate")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                if self._calls.get(key) is flight:
+                    del self._calls[key]
+                flight.task.cancel()
+
+    async def _produce(self, key: str, broadcast: _Broadcast, source: AsyncIterator[Any]) -> None:
+        try:
+            async for item in source:
+                broadcast.items.append(item)
+                broadcast.notify()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            await source.aclose()
+            broadcast.done = True
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            broadcast.notify()
+
+    async def stream(
+        self, key: str, open_source: Callable[[], AsyncIterator[Any]], model: str
+    ) -> AsyncGenerator[List[Any], None]:
+        """Yield the items of ``open_source()`` in batches, sharing one upstream stream
+        between identical requests.
+
+        The first batch holds everything the shared stream produced before this
+        subscriber joined (empty for the request that started it); each later batch
+        holds the items that arrived since the previous one.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.stats["calls"] += 1
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.create_task(
+                self._produce(key, broadcast, open_source())
+            )
+        else:
+            self.stats["coalesced"] += 1
+            metrics.record_coalesced(model, "stream")
+            logger.debug("Joining in-flight stream after %d items", len(broadcast.items))
+
+        broadcast.subscribers += 1
+        try:
+            position = len(broadcast.items)
+            yield broadcast.items[:position]
+            while True:
+                if position < len(broadcast.items):
+                    batch = broadcast.items[position:]
+                    position += len(batch)
+                    yield batch
+                elif broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                else:
+                    await broadcast.changed()
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+                broadcast.task.cancel()
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import random
+import time
+from typing import AsyncGenerator, List, Optional
+from app.core import metrics
+from app.core.config import settings
+from app.schemas.chat import ChatMessage, StreamingChatResponse
+from app.services.backend import SummarizationBackend
+from app.services.pacing import pace_stream
+from app.services.prompts import get_template
+from app.services.tokens import estimate_tokens
+
+STUB_MODEL = "stub"
+_SECTION_TOKENS = 48  # Partial summaries are a few bullet points
+
+_VOCABULARY = (
+    "the team agreed to ship release plan budget review customer feedback latency "
+    "report quarter revenue growth risk action item owner deadline migration service "
+    "database cache throughput error rate incident follow up design proposal metrics "
+    "dashboard summary priority scope timeline dependency testing rollout security "
+    "compliance hiring roadmap milestone decision open question next steps"
+).split()
+
+
+class StubBackend(SummarizationBackend):
+    """Deterministic local backend for load testing the API layer.
+
+    Output depends only on the input text, so repeated runs produce identical bytes.
+    Time to first token, throughput and output length come from the STUB_* settings.
+    No threads or network calls are involved.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        first_token_latency: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        output_tokens: Optional[int] = None,
+        tokens_per_chunk: Optional[int] = None,
+    ):
+        self.first_token_latency = (
+            first_token_latency
+            if first_token_latency is not None
+            else settings.STUB_FIRST_TOKEN_LATENCY_MS / 1000
+        )
+        self.tokens_per_second = (
+            tokens_per_second if tokens_per_second is not None else settings.STUB_TOKENS_PER_SECOND
+        )
+        self.output_tokens = output_tokens or settings.STUB_OUTPUT_TOKENS
+        self.tokens_per_chunk = max(1, tokens_per_chunk or settings.STUB_TOKENS_PER_CHUNK)
+
+    def is_model_allowed(self, model: str) -> bool:
+        return True
+
+    def _tokens(self, user_message: str, max_tokens: Optional[int]) -> List[str]:
+        seed = hashlib.sha256(user_message.encode("utf-8")).digest()
+        rng = random.Random(seed)
+        count = min(self.output_tokens, max_tokens or self.output_tokens)
+        tokens = ["# Summary\n\n"]
+        # Twelve-word bullet points, so the output looks like a markdown summary
+        for index in range(count - 1):
+            word = rng.choice(_VOCABULARY)
+            position = index % 12
+            if position == 0:
+                tokens.append(f"- {word} ")
+            elif position == 11:
+                tokens.append(f"{word}\n")
+            else:
+                tokens.append(f"{word} ")
+        return tokens
+
+    def _usage(
+        self,
+        user_message: str,
+        history: List[ChatMessage],
+        content_type: Optional[str],
+        tokens: List[str],
+    ) -> dict:
+        prompt = get_template(content_type).render(user_message, history)
+        prompt_tokens = estimate_tokens(prompt)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+
+    async def _chunks(self, tokens: List[str]) -> AsyncGenerator[str, None]:
+        started_at = time.perf_counter()
+        await asyncio.sleep(self.first_token_latency)
+        metrics.observe_time_to_first_token(STUB_MODEL, time.perf_counter() - started_at)
+        step = self.tokens_per_chunk
+        delay = step / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        for start in range(0, len(tokens), step):
+            if start and delay:
+                await asyncio.sleep(delay)
+            yield "".join(tokens[start:start + step])
+        metrics.observe_upstream(STUB_MODEL, "stream", time.perf_counter() - started_at)
+
+    async def chat_completion(
+        self,
+        user_message: str,
+        conversation_history: List[ChatMessage] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        summarization_mode: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> dict:
+        metrics.set_model_label(STUB_MODEL)
+        tokens = self._tokens(user_message, max_tokens)
+        started_at = time.perf_counter()
+        duration = self.first_token_latency
+        if self.tokens_per_second > 0:
+            duration += len(tokens) / self.tokens_per_second
+        await asyncio.sleep(duration)
+        metrics.observe_upstream(STUB_MODEL, "generate", time.perf_counter() - started_at)
+        return {
+            "content": "".join(tokens),
+            "model": STUB_MODEL,
+            "usage": self._usage(
+                user_message, conversation_history or [], content_type, tokens
+            ),
+        }
+
+    async def summarize_section(
+        self,
+        text: str,
+        position: str,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        tokens = self._tokens(text, _SECTION_TOKENS)[1:]  # Bullets without the heading
+        started_at = time.perf_counter()
+        duration = self.first_token_latency
+        if self.tokens_per_second > 0:
+            duration += len(tokens) / self.tokens_per_second
+        await asyncio.sleep(duration)
+        metrics.observe_upstream(STUB_MODEL, "map", time.perf_counter() - started_at)
+        return "".join(tokens)
+
+    async def chat_completion_stream(
+        self,
+        user_message: str,
+        conversation_history: List[ChatMessage] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        pacing: Optional[str] = None,
+        use_cache: bool = True,
+        summarization_mode: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> AsyncGenerator[StreamingChatResponse, None]:
+        metrics.set_model_label(STUB_MODEL)
+        tokens = self._tokens(user_message, max_tokens)
+        async for piece in pace_stream(self._chunks(tokens), pacing or settings.STREAMING_PACING_MODE):
+            yield StreamingChatResponse.model_construct(
+                content=piece, is_complete=False, model=STUB_MODEL
+            )
+        yield StreamingChatResponse(
+            content="",
+            is_complete=True,
+            model=STUB_MODEL,
+            usage=self._usage(
+                user_message, conversation_history or [], content_type, tokens
+            ),
+        )
@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough average for English text; only used when no exact count is available
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def usage_from_metadata(metadata: Any) -> Optional[Dict[str, int]]:
+    """Build a usage block from Gemini ``usage_metadata``, or None when it is missing"""
+    if metadata is None:
+        return None
+    prompt_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+    completion_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+    if not prompt_tokens and not completion_tokens:
+        return None
+    total_tokens = getattr(metadata, "total_token_count", 0) or (
+        prompt_tokens + completion_tokens
+    )
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+    }
+
+
+class TokenCounter:
+    """Exact token counts from the model's ``count_tokens`` call, cached by content hash.
+
+    Counting runs in the SDK thread pool. If the call fails, the local estimate is
+    returned (and not cached) so accounting never fails a request.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_entries: int = 1024):
+        self.executor = executor
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def count(self, model: Any, text: str) -> int:
+        # Models are cached for the process lifetime by the registry, so id() is stable
+        key = (id(model), hashlib.sha256(text.encode("utf-8")).digest())
+        with self._lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, model.count_tokens, text
+            )
+            tokens = result.total_tokens
+        except Exception as e:
+            logger.warning(f"count_tokens failed, using estimate: {str(e)}")
+            return estimate_tokens(text)
+
+        with self._lock:
+            self._counts[key] = tokens
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return tokens
@@ -0,0 +1,350 @@
+import asyncio
+import codecs
+import logging
+import re
+from html.parser import HTMLParser
+from typing import (
+    Any, AsyncContextManager, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional, Tuple,
+)
+from starlette.requests import Request
+from app.core.exceptions import GeminiServiceException
+from app.services.backend import SummarizationBackend
+from app.services.chunking import IncrementalChunker
+from app.services.prompts import reduce_message
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13 only ships the ``multipart`` module
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# Media types accepted as a raw request body or as the ``file`` part of a form upload
+_FORMATS = {
+    "text/plain": "text",
+    "text/markdown": "text",
+    "text/x-markdown": "text",
+    "text/html": "html",
+    "application/xhtml+xml": "html",
+}
+_EXTENSIONS = {".html": "html", ".htm": "html", ".xhtml": "html"}
+
+_BLOCK_TAGS = frozenset(
+    {
+        "address", "article", "aside", "blockquote", "div", "dl", "dt", "dd", "figure",
+        "footer", "form", "header", "hr", "main", "nav", "ol", "p", "pre", "section",
+        "table", "tr", "ul",
+    }
+)
+_SKIPPED_TAGS = frozenset({"head", "script", "style", "noscript", "template", "svg"})
+_HEADINGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+_SPACES = re.compile(r"\s+")
+
+
+class _HTMLText(HTMLParser):
+    """Incremental HTML to plain text: block elements become paragraphs, headings and
+    list items keep their markdown form, scripts and styles are dropped"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._newlines = 2  # Newlines at the end of the output so far
+
+    def _emit(self, text: str) -> None:
+        self._parts.append(text)
+        stripped = text.rstrip("\n")
+        if stripped:
+            self._newlines = len(text) - len(stripped)
+        else:
+            self._newlines += len(text)
+
+    def _break(self, newlines: int) -> None:
+        """End the current line or paragraph without stacking blank lines"""
+        if self._parts and self._parts[-1].endswith(" "):
+            self._parts[-1] = self._parts[-1].rstrip(" ")
+        if self._newlines < newlines:
+            self._emit("\n" * (newlines - self._newlines))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in _HEADINGS:
+            self._break(2)
+            self._emit("#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self._break(1)
+            self._emit("- ")
+        elif tag == "br":
+            self._emit("\n")
+        elif tag in ("td", "th"):
+            self._emit(" | ")
+        elif tag in _BLOCK_TAGS:
+            self._break(2)
+        if tag == "pre":
+            self._pre_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS or tag in _HEADINGS:
+            self._break(2)
+        if tag == "pre":
+            self._pre_depth = max(0, self._pre_depth - 1)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if not self._pre_depth:
+            data = _SPACES.sub(" ", data)
+            if self._newlines:
+                data = data.lstrip(" ")
+        if data:
+            self._emit(data)
+
+    def take(self) -> str:
+        text = "".join(self._parts)
+        self._parts.clear()
+        return text
+
+
+class TextNormalizer:
+    """Decode an upload incrementally and turn it into plain text for the chunker.
+
+    Bytes are decoded as UTF-8 (a BOM is dropped, invalid sequences are replaced),
+    line endings are normalized and HTML is reduced to its text. Multi-byte
+    characters and ``\\r\\n`` pairs split across network reads are handled.
+    """
+
+    def __init__(self, document_format: str):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._html = _HTMLText() if document_format == "html" else None
+        self._pending_cr = False
+
+    def _text(self, text: str, final: bool) -> str:
+        if self._pending_cr:
+            text = "\r" + text
+        self._pending_cr = not final and text.endswith("\r")
+        if self._pending_cr:
+            text = text[:-1]
+        text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "")
+        if self._html is None:
+            return text
+        self._html.feed(text)
+        if final:
+            self._html.close()
+        return self._html.take()
+
+    def feed(self, data: bytes) -> str:
+        return self._text(self._decoder.decode(data), final=False)
+
+    def close(self) -> str:
+        return self._text(self._decoder.decode(b"", final=True), final=True)
+
+
+def _document_format(content_type: str, filename: Optional[str]) -> Optional[str]:
+    media_type = content_type.partition(";")[0].strip().lower()
+    if filename:
+        extension = filename[filename.rfind("."):].lower() if "." in filename else ""
+        if extension in _EXTENSIONS:
+            return _EXTENSIONS[extension]
+        if media_type in ("", "application/octet-stream"):
+            return "text"
+    return _FORMATS.get(media_type)
+
+
+class DocumentUpload:
+    """Reads a document from the request body without buffering it.
+
+    Accepts either a ``multipart/form-data`` body with the document in a ``file``
+    part, or the document itself as a ``text/plain``, ``text/markdown`` or
+    ``text/html`` body. ``sections`` yields normalized text chunks as soon as enough
+    of the document has arrived.
+    """
+
+    def __init__(self, request: Request, max_bytes: int):
+        self.request = request
+        self.max_bytes = max_bytes
+        self.received_bytes = 0
+        self.document_format: Optional[str] = None
+
+    async def _body(self) -> AsyncGenerator[bytes, None]:
+        declared = self.request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise GeminiServiceException(
+                f"Upload exceeds the {self.max_bytes}-byte limit", 413
+            )
+        async for data in self.request.stream():
+            self.received_bytes += len(data)
+            if self.received_bytes > self.max_bytes:
+                raise GeminiServiceException(
+                    f"Upload exceeds the {self.max_bytes}-byte limit", 413
+                )
+            if data:
+                yield data
+
+    async def _multipart(self, boundary: bytes) -> AsyncGenerator[bytes, None]:
+        received: List[bytes] = []
+        headers: Dict[bytes, bytes] = {}
+        header_field = bytearray()
+        header_value = bytearray()
+        in_file = False
+        file_seen = False
+
+        def on_part_begin():
+            headers.clear()
+
+        def on_header_field(data, start, end):
+            header_field.extend(data[start:end])
+
+        def on_header_value(data, start, end):
+            header_value.extend(data[start:end])
+
+        def on_header_end():
+            headers[bytes(header_field).lower()] = bytes(header_value)
+            header_field.clear()
+            header_value.clear()
+
+        def on_headers_finished():
+            nonlocal in_file, file_seen
+            _, options = parse_options_header(headers.get(b"content-disposition", b""))
+            if file_seen or options.get(b"name") != b"file":
+                return
+            filename = options.get(b"filename", b"").decode("utf-8", "replace") or None
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            self.document_format = _document_format(content_type, filename or "upload")
+            if self.document_format is None:
+                raise GeminiServiceException(
+                    f"Unsupported document type '{content_type}', "
+                    "upload text, markdown or HTML",
+                    415,
+                )
+            in_file = file_seen = True
+
+        def on_part_data(data, start, end):
+            if in_file:
+                received.append(data[start:end])
+
+        def on_part_end():
+            nonlocal in_file
+            in_file = False
+
+        parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": on_part_begin,
+                "on_header_field": on_header_field,
+                "on_header_value": on_header_value,
+                "on_header_end": on_header_end,
+                "on_headers_finished": on_headers_finished,
+                "on_part_data": on_part_data,
+                "on_part_end": on_part_end,
+            },
+        )
+        async for data in self._body():
+            try:
+                parser.write(data)
+            except GeminiServiceException:
+                raise
+            except Exception as e:
+                raise GeminiServiceException(f"Malformed multipart body: {str(e)}", 400)
+            if received:
+                yield b"".join(received)
+                received.clear()
+        parser.finalize()
+        if not file_seen:
+            raise GeminiServiceException("Multipart upload has no 'file' part", 400)
+
+    def _document(self) -> AsyncGenerator[bytes, None]:
+        content_type, options = parse_options_header(
+            self.request.headers.get("content-type", "")
+        )
+        if content_type == b"multipart/form-data":
+            boundary = options.get(b"boundary")
+            if not boundary:
+                raise GeminiServiceException("Multipart upload without a boundary", 400)
+            return self._multipart(boundary)
+
+        media_type = content_type.decode("latin-1")
+        self.document_format = _document_format(media_type, None)
+        if self.document_format is None:
+            raise GeminiServiceException(
+                f"Unsupported document type '{media_type}', upload text, markdown or HTML",
+                415,
+            )
+        return self._body()
+
+    async def sections(self, max_chars: int) -> AsyncGenerator[str, None]:
+        """Yield the document as normalized text sections of at most ``max_chars``"""
+        chunker = IncrementalChunker(max_chars)
+        normalizer: Optional[TextNormalizer] = None
+        async for data in self._document():
+            if normalizer is None:
+                normalizer = TextNormalizer(self.document_format)
+            for section in chunker.feed(normalizer.feed(data)):
+                yield section
+        if normalizer is not None:
+            for section in chunker.feed(normalizer.close()):
+                yield section
+        for section in chunker.close():
+            yield section
+
+
+async def condense_sections(
+    backend: SummarizationBackend,
+    sections: AsyncIterator[str],
+    model: Optional[str],
+    temperature: Optional[float],
+    concurrency: int,
+    max_sections: int,
+    admit: Callable[[], AsyncContextManager[Any]],
+) -> Tuple[str, int]:
+    """Summarize sections while later ones are still being read (map) and return the
+    message for the final summary with the number of sections.
+
+    Each section is handed to the backend as soon as the next one starts arriving,
+    with at most ``concurrency`` summaries in flight. A document that turns out to be
+    a single section is returned unchanged, without a map call. A failed summary
+    stops the upload early instead of after the whole body has been read. Each
+    summary call runs inside ``admit()`` (an admission slot), so reading a slow
+    upload holds no slot and every upstream call counts against the global limit.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks: List[asyncio.Task] = []
+    first: Optional[str] = None
+
+    async def summarize(index: int, text: str) -> str:
+        async with semaphore:
+            async with admit():
+                return await backend.summarize_section(text, str(index + 1), model, temperature)
+
+    try:
+        async for section in sections:
+            if first is None:
+                first = section
+                continue
+            if not tasks:
+                tasks.append(asyncio.create_task(summarize(0, first)))
+            if len(tasks) >= max_sections:
+                raise GeminiServiceException(
+                    f"Document exceeds the maximum of {max_sections} sections", 413
+                )
+            tasks.append(asyncio.create_task(summarize(len(tasks), section)))
+            for task in tasks:
+                if task.done() and task.exception() is not None:
+                    raise task.exception()
+
+        if first is None:
+            raise GeminiServiceException("Uploaded document is empty", 400)
+        if not tasks:
+            return first, 1
+
+        logger.info(f"Upload read, waiting for {len(tasks)} section summaries")
+        partials = await asyncio.gather(*tasks)
+        return reduce_message(partials), len(tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,89 @@
+"""Micro-benchmark: per-request overhead of the Prometheus middleware and service hooks.
+
+Drives the ASGI app in-process (no sockets) so the numbers isolate the
+instrumentation cost. Run from the backend directory:
+
+    python -m benchmarks.bench_metrics_overhead
+"""
+import asyncio
+import os
+import time
+import timeit
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from fastapi import FastAPI  # noqa: E402
+
+from app.core import metrics  # noqa: E402
+from app.core.metrics import MetricsMiddleware  # noqa: E402
+
+REQUESTS = 20000
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/health/live")
+    async def live():
+        return {"status": "alive"}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/health/live",
+        "raw_path": b"/api/v1/health/live",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # Warm-up builds the route table and the label children
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started_at) / requests
+
+
+def hook_costs() -> None:
+    number = 200000
+    hooks = {
+        "observe_upstream": lambda: metrics.observe_upstream("gemini-1.5-flash", "generate", 0.1),
+        "record_cache_lookup": lambda: metrics.record_cache_lookup("gemini-1.5-flash", True),
+        "observe_stream": lambda: metrics.observe_stream("gemini-1.5-flash", 40, 4096),
+    }
+    for name, hook in hooks.items():
+        seconds = timeit.timeit(hook, number=number)
+        print(f"{name:>22}: {seconds / number * 1e6:.2f} us/call")
+
+
+def main():
+    baseline = asyncio.run(drive(build_app(False), REQUESTS))
+    instrumented = asyncio.run(drive(build_app(True), REQUESTS))
+    print(f"{'baseline':>22}: {baseline * 1e6:.1f} us/request")
+    print(f"{'with middleware':>22}: {instrumented * 1e6:.1f} us/request")
+    print(f"{'overhead':>22}: {(instrumented - baseline) * 1e6:.1f} us/request")
+    hook_costs()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Micro-benchmark: parallel Gemini streams through GeminiService against the fake
+model, with the blocking SDK iterator driven in worker threads (app/core/streaming.py)
+vs. the legacy loop that read every chunk on the event loop.
+
+Reports the wall time of N concurrent streams (which should stay close to the time
+of one) and the longest event loop stall seen meanwhile. A second check stops a
+stalled stream early on a one-thread pool and measures how long the next stream waits
+for that thread. Run from the backend directory:
+
+    python -m benchmarks.bench_parallel_streams
+"""
+import asyncio
+import os
+import time
+
+os.environ.update(
+    GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY") or "benchmark",
+    CACHE_ENABLED="false",
+    SINGLE_FLIGHT_ENABLED="false",
+    STREAMING_PACING_MODE="passthrough",
+)
+
+import google.generativeai as genai  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.gemini_service import GeminiService  # noqa: E402
+from benchmarks.fake_gemini import FakeBehaviour, install  # noqa: E402
+
+_LATENCY = 0.2
+_CHUNKS = [f"- point {i}\n" for i in range(10)]
+_CHUNK_DELAY = 0.03
+
+
+async def _current(service: GeminiService, index: int) -> None:
+    async for _ in service.chat_completion_stream(f"Document {index}", use_cache=False):
+        pass
+
+
+async def _legacy(service: GeminiService, index: int) -> None:
+    """The stream loop before the worker-thread bridge: only the call is off the loop"""
+    model = genai.GenerativeModel(settings.GEMINI_MODEL)
+    response = await asyncio.to_thread(model.generate_content, f"Document {index}", stream=True)
+    for _ in response:
+        pass
+
+
+async def _max_loop_lag(done: asyncio.Event) -> float:
+    lag = 0.0
+    while not done.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lag = max(lag, time.perf_counter() - started_at - 0.005)
+    return lag
+
+
+async def parallel(service: GeminiService, run, streams: int) -> None:
+    done = asyncio.Event()
+    lag = asyncio.create_task(_max_loop_lag(done))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(run(service, i) for i in range(streams)))
+    elapsed = time.perf_counter() - started_at
+    done.set()
+    print(
+        f"{run.__name__.strip('_'):<8} {streams:>3} streams: {elapsed * 1000:7.0f}ms  "
+        f"max loop lag {await lag * 1000:6.1f}ms"
+    )
+
+
+async def early_stop() -> None:
+    """Stop a stalled stream after its first chunk; the next stream needs its thread"""
+    settings.UPSTREAM_THREAD_POOL_SIZE = 1
+    behaviour = install(
+        FakeBehaviour(latency=_LATENCY, chunks=_CHUNKS, chunk_delay=_CHUNK_DELAY, stall_after_chunks=1)
+    )
+    service = GeminiService()
+    stalled = service.chat_completion_stream("Stalled document", use_cache=False)
+    await stalled.__anext__()
+    await asyncio.sleep(0.1)  # Let the worker block on the stalled read
+    await stalled.aclose()
+
+    behaviour.stall_after_chunks = None
+    started_at = time.perf_counter()
+    try:
+        await asyncio.wait_for(_current(service, 0), timeout=5)
+        outcome = f"next stream done in {(time.perf_counter() - started_at) * 1000:.0f}ms"
+    except asyncio.TimeoutError:
+        outcome = "next stream still waiting for the thread after 5s"
+    behaviour.release()
+    service.executor.shutdown(wait=False)
+    print(f"early stop, 1-thread pool: {outcome}")
+
+
+async def main() -> None:
+    settings.UPSTREAM_THREAD_POOL_SIZE = 128
+    install(FakeBehaviour(latency=_LATENCY, chunks=_CHUNKS, chunk_delay=_CHUNK_DELAY))
+    service = GeminiService()
+    print(f"one stream takes about {(_LATENCY + _CHUNK_DELAY * (len(_CHUNKS) - 1)) * 1000:.0f}ms")
+    for streams in (1, 8, 32, 64):
+        await parallel(service, _current, streams)
+    for streams in (1, 8):
+        await parallel(service, _legacy, streams)
+    service.executor.shutdown(wait=False)
+    await early_stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
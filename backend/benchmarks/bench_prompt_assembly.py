@@ -0,0 +1,64 @@
+"""Micro-benchmark: legacy prompt concatenation vs. compiled prompt templates.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_prompt_assembly
+"""
+import os
+import timeit
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from app.schemas.chat import ChatMessage  # noqa: E402
+from app.services.prompts import PROMPT_TEMPLATES, get_template  # noqa: E402
+
+# The instruction block used to be a literal inside _prepare_messages and was
+# prepended to the user text on every request
+LEGACY_INSTRUCTIONS = (
+    PROMPT_TEMPLATES["auto"].system_instruction.rsplit("\n\n", 1)[0]
+    + "\n\nNow provide a well-formatted markdown summary of the following content:\n\n"
+)
+
+
+def legacy_prepare_messages(user_message, conversation_history):
+    full_conversation = LEGACY_INSTRUCTIONS
+    for msg in conversation_history:
+        if msg.role == "user":
+            full_conversation += f"\nUser: {msg.content}"
+        elif msg.role == "assistant":
+            full_conversation += f"\nAssistant: {msg.content}"
+    full_conversation += f"\nUser: {user_message}\nAssistant: "
+    return full_conversation
+
+
+def make_history(turns, message_chars):
+    history = []
+    for i in range(turns):
+        history.append(ChatMessage(role="user", content="u" * message_chars))
+        history.append(ChatMessage(role="assistant", content="a" * message_chars))
+    return history
+
+
+def main():
+    template = get_template("auto")
+    user_message = "x" * 2000
+    print(f"{'turns':>6} {'legacy_us':>10} {'template_us':>12} {'legacy_bytes':>13} {'template_bytes':>15}")
+    for turns in (0, 5, 20, 100):
+        history = make_history(turns, 1500)
+        number = 2000 if turns < 100 else 200
+        legacy = timeit.timeit(
+            lambda: legacy_prepare_messages(user_message, history), number=number
+        )
+        compiled = timeit.timeit(
+            lambda: template.render(user_message, history), number=number
+        )
+        legacy_bytes = len(legacy_prepare_messages(user_message, history))
+        template_bytes = len(template.render(user_message, history))
+        print(
+            f"{turns:>6} {legacy / number * 1e6:>10.1f} {compiled / number * 1e6:>12.1f} "
+            f"{legacy_bytes:>13} {template_bytes:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
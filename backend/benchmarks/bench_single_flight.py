@@ -0,0 +1,72 @@
+"""Micro-benchmark: upstream calls and latency for a burst of identical summaries,
+with and without request coalescing (SINGLE_FLIGHT_ENABLED).
+
+Requests arrive spread over the first half of one upstream call against a fake
+Gemini model, like a shared document link opened by many users at once. The
+response cache is off, so only in-flight deduplication is measured. Run from the
+backend directory:
+
+    python -m benchmarks.bench_single_flight
+"""
+import asyncio
+import os
+import time
+
+os.environ.update(
+    GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY") or "benchmark",
+    CACHE_ENABLED="false",
+    STREAMING_PACING_MODE="passthrough",
+)
+
+from app.core.config import settings  # noqa: E402
+from app.services.gemini_service import GeminiService  # noqa: E402
+from benchmarks.fake_gemini import FakeBehaviour, install  # noqa: E402
+
+_LATENCY = 0.4
+_CHUNKS = [f"- point {i}\n" for i in range(20)]
+_CHUNK_DELAY = 0.02
+
+
+async def _stream(service: GeminiService, delay: float) -> float:
+    await asyncio.sleep(delay)
+    started_at = time.perf_counter()
+    async for _ in service.chat_completion_stream("Shared document " * 200):
+        pass
+    return time.perf_counter() - started_at
+
+
+async def _complete(service: GeminiService, delay: float) -> float:
+    await asyncio.sleep(delay)
+    started_at = time.perf_counter()
+    await service.chat_completion("Shared document " * 200)
+    return time.perf_counter() - started_at
+
+
+async def burst(kind: str, requests: int, enabled: bool) -> None:
+    settings.SINGLE_FLIGHT_ENABLED = enabled
+    behaviour = install(FakeBehaviour(latency=_LATENCY, chunks=_CHUNKS, chunk_delay=_CHUNK_DELAY))
+    service = GeminiService()
+    run = _stream if kind == "stream" else _complete
+    spread = _LATENCY / 2
+    latencies = sorted(
+        await asyncio.gather(*(run(service, spread * i / requests) for i in range(requests)))
+    )
+    service.executor.shutdown(wait=False)
+    print(
+        f"{kind:<8} {requests:>4} requests  coalescing={str(enabled):<5}: "
+        f"{behaviour.calls:>4} upstream calls, "
+        f"p50 {latencies[len(latencies) // 2] * 1000:6.0f}ms  max {latencies[-1] * 1000:6.0f}ms"
+    )
+
+
+async def main() -> None:
+    # Each stream holds an SDK thread while it runs
+    settings.UPSTREAM_THREAD_POOL_SIZE = 256
+    for kind in ("complete", "stream"):
+        for requests in (10, 100):
+            for enabled in (False, True):
+                await burst(kind, requests, enabled)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""Micro-benchmark: SSE encoding throughput, legacy per-chunk path vs. app.core.sse.
+
+Measures encoded bytes per second on one core for content chunks, and the number of
+ASGI writes and wall time for a burst of ready events with and without batching.
+Run from the backend directory:
+
+    python -m benchmarks.bench_sse_encoding
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from starlette.responses import StreamingResponse  # noqa: E402
+
+from app.core import sse  # noqa: E402
+from app.schemas.chat import StreamingChatResponse  # noqa: E402
+
+EVENTS = 200000
+MODEL = "gemini-1.5-flash"
+
+# DEBUG is off in production, as it is here
+logger = logging.getLogger("benchmarks.sse")
+logger.setLevel(logging.INFO)
+
+
+def legacy_event(event_id: int, content: str) -> bytes:
+    """What chat.py did per chunk before app.core.sse existed"""
+    chunk = StreamingChatResponse(content=content, is_complete=False, model=MODEL)
+    logger.debug(f"Received chunk #{event_id} from backend: {chunk}")
+    chunk_data = chunk.model_dump()
+    sse_data = f"id: {event_id}\nevent: message\ndata: {json.dumps(chunk_data)}\n\n"
+    logger.debug(f"Sending SSE data: {sse_data[:100]}...")
+    # StreamingResponse encodes str bodies as UTF-8
+    return sse_data.encode("utf-8")
+
+
+def current_event(event_id: int, content: str) -> bytes:
+    chunk = StreamingChatResponse.model_construct(content=content, is_complete=False, model=MODEL)
+    event = sse.encode_message(event_id, chunk.content, chunk.model)
+    logger.debug("Sending SSE event #%d (%d bytes)", event_id, len(event))
+    return event
+
+
+def encoding_throughput(content: str) -> None:
+    assert legacy_event(1, content) == current_event(1, content), "wire format changed"
+    results = {}
+    for name, encode in (("legacy", legacy_event), ("sse module", current_event)):
+        total = 0
+        started_at = time.process_time()
+        for event_id in range(EVENTS):
+            total += len(encode(event_id, content))
+        elapsed = time.process_time() - started_at
+        results[name] = total / elapsed
+        print(
+            f"{name:>12} {len(content):>3}B chunks: {EVENTS / elapsed / 1000:7.0f}k events/s "
+            f"{total / elapsed / 1e6:6.1f} MB/s per core"
+        )
+    print(f"{'speedup':>12}: {results['sse module'] / results['legacy']:.2f}x")
+
+
+async def write_burst(events: int, max_bytes: int) -> tuple:
+    async def source():
+        for event_id in range(events):
+            yield sse.encode_message(event_id, "quarterly revenue ", MODEL)
+
+    writes = 0
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal writes
+        if message["type"] == "http.response.body" and message.get("body"):
+            writes += 1
+
+    response = StreamingResponse(sse.batch_ready(source(), max_bytes), media_type="text/event-stream")
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "method": "POST"}
+    started_at = time.perf_counter()
+    await response(scope, receive, send)
+    return writes, time.perf_counter() - started_at
+
+
+def batching() -> None:
+    events = 20000
+    for max_bytes in (0, 4096):
+        writes, elapsed = asyncio.run(write_burst(events, max_bytes))
+        print(
+            f"burst of {events} ready events, SSE_BATCH_MAX_BYTES={max_bytes:<5}: "
+            f"{writes:>6} writes in {elapsed * 1000:.0f}ms"
+        )
+
+
+def main():
+    encoding_throughput("quarterly revenue ")
+    encoding_throughput("the team agreed to ship the release plan after the budget review ")
+    batching()
+
+
+if __name__ == "__main__":
+    main()
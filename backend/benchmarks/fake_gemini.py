@@ -0,0 +1,143 @@
+"""Fake ``genai.GenerativeModel`` with injectable latency, errors and stalls.
+
+Used by the benchmark and scenario scripts to exercise the service without network
+access or API quota:
+
+    from benchmarks.fake_gemini import FakeBehaviour, install
+    behaviour = install(FakeBehaviour(latency=0.05, error_rate=0.1))
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+
+@dataclass
+class FakeBehaviour:
+    latency: float = 0.05  # Seconds until the response (or first chunk)
+    slow_ratio: float = 0.0  # Share of calls that take slow_latency instead
+    slow_latency: float = 2.0
+    error_rate: float = 0.0  # Share of calls failing with make_error()
+    make_error: Callable[[], Exception] = lambda: google_exceptions.ServiceUnavailable(
+        "injected"
+    )
+    fail_next: List[Exception] = field(default_factory=list)  # Raised in order first
+    chunks: List[str] = field(
+        default_factory=lambda: ["# Summary\n\n", "- First point\n", "- Second point\n"]
+    )
+    chunk_delay: float = 0.01
+    stall_after_chunks: Optional[int] = None  # Block after this many chunks until release()
+    calls: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _unstall: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def release(self) -> None:
+        """Unblock stalled streams so their worker threads can exit"""
+        self._unstall.set()
+
+    def begin_call(self) -> float:
+        """Count the call, raise any injected error and return its latency"""
+        with self._lock:
+            self.calls += 1
+            if self.fail_next:
+                raise self.fail_next.pop(0)
+        if random.random() < self.error_rate:
+            raise self.make_error()
+        return self.slow_latency if random.random() < self.slow_ratio else self.latency
+
+
+class _UsageMetadata:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = completion_tokens
+        self.total_token_count = prompt_tokens + completion_tokens
+
+
+class _Response:
+    def __init__(self, text: str, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class _CountTokensResponse:
+    def __init__(self, total_tokens: int):
+        self.total_tokens = total_tokens
+
+
+class _Stream:
+    """Blocking chunk iterator that can be cancelled from another thread, like the
+    gRPC call behind the SDK's streaming response"""
+
+    def __init__(self, behaviour: FakeBehaviour, latency: float, usage: _UsageMetadata):
+        self.behaviour = behaviour
+        self.latency = latency
+        self.usage = usage
+        self.index = 0
+        self.cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def _wait(self, seconds: Optional[float]) -> None:
+        if self.cancelled.wait(seconds):
+            raise google_exceptions.Cancelled("stream cancelled")
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> _Response:
+        behaviour = self.behaviour
+        if self.index >= len(behaviour.chunks):
+            raise StopIteration
+        if self.index == 0:
+            self._wait(self.latency)
+        elif behaviour.stall_after_chunks is not None and self.index >= behaviour.stall_after_chunks:
+            # Stalled until released or cancelled
+            while not behaviour._unstall.is_set():
+                self._wait(0.01)
+            raise StopIteration
+        else:
+            self._wait(behaviour.chunk_delay)
+        chunk = behaviour.chunks[self.index]
+        self.index += 1
+        last = self.index == len(behaviour.chunks)
+        return _Response(chunk, self.usage if last else None)
+
+
+class FakeGenerativeModel:
+    behaviour = FakeBehaviour()
+
+    def __init__(self, model_name: str, system_instruction: Optional[str] = None, **kwargs):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+
+    def count_tokens(self, contents, request_options=None, **kwargs) -> _CountTokensResponse:
+        return _CountTokensResponse(len(str(contents)) // 4)
+
+    def generate_content(
+        self, contents, generation_config=None, stream=False, request_options=None, **kwargs
+    ):
+        behaviour = self.behaviour
+        latency = behaviour.begin_call()
+        timeout = (request_options or {}).get("timeout")
+        usage = _UsageMetadata(len(str(contents)) // 4, sum(len(c) for c in behaviour.chunks) // 4)
+
+        if not stream:
+            if timeout is not None and latency > timeout:
+                time.sleep(timeout)
+                raise google_exceptions.DeadlineExceeded("injected request timeout")
+            time.sleep(latency)
+            return _Response("".join(behaviour.chunks), usage)
+
+        return _Stream(behaviour, latency, usage)
+
+
+def install(behaviour: Optional[FakeBehaviour] = None) -> FakeBehaviour:
+    """Replace ``genai.GenerativeModel`` with the fake; returns the active behaviour"""
+    FakeGenerativeModel.behaviour = behaviour or FakeBehaviour()
+    genai.GenerativeModel = FakeGenerativeModel
+    return FakeGenerativeModel.behaviour
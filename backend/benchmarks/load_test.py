@@ -0,0 +1,310 @@
+"""Load test for /api/v1/chat/completions and /api/v1/chat/stream.
+
+Starts a local uvicorn server on the deterministic stub backend (LLM_BACKEND=stub)
+for every STREAMING_CHUNK_SIZE / STREAMING_DELAY_MS combination, sweeps the given
+concurrency levels and records throughput, latency percentiles, time to first SSE
+event and server memory per concurrent stream. Results are written as JSON; pass
+``--compare`` with an earlier result file to flag regressions (exit status 1).
+
+Run from the backend directory:
+
+    python -m benchmarks.load_test --concurrency 1,8,32 --chunk-sizes 2,8 --delays 0,50
+    python -m benchmarks.load_test --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+API = "/api/v1/chat"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def parse_ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of ``pid`` from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, env_overrides: Dict[str, str]) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LLM_BACKEND": "stub",
+        "LOG_LEVEL": "WARNING",
+        "CACHE_ENABLED": "false",
+        # The load generator is a single client; keep admission control out of the way
+        "ADMISSION_PER_CLIENT_MAX": "0",
+        "ADMISSION_MAX_CONCURRENT": "100000",
+        "ADMISSION_MAX_QUEUE": "100000",
+        **env_overrides,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/v1/health/live", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Server did not become ready")
+
+
+async def one_request(client: httpx.AsyncClient, endpoint: str, index: int) -> dict:
+    body = {
+        "message": f"Load test document {index}. " * 20,
+        "stream": endpoint == "stream",
+        "use_cache": False,
+    }
+    started_at = time.perf_counter()
+    first_event = None
+    ok = True
+    if endpoint == "stream":
+        async with client.stream("POST", f"{API}/stream", json=body) as response:
+            ok = response.status_code == 200
+            async for chunk in response.aiter_bytes():
+                if first_event is None and b"event: message" in chunk:
+                    first_event = time.perf_counter() - started_at
+                if b"event: error" in chunk:
+                    ok = False
+    else:
+        response = await client.post(f"{API}/completions", json=body)
+        ok = response.status_code == 200
+    return {"latency": time.perf_counter() - started_at, "ttfe": first_event, "ok": ok}
+
+
+async def run_level(
+    base_url: str, pid: int, endpoint: str, concurrency: int, total: int
+) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        # Warm up connections and lazily built server state
+        await asyncio.gather(*(one_request(client, endpoint, -i) for i in range(concurrency)))
+        baseline_rss = rss_mb(pid)
+        peak_rss = baseline_rss
+        samples: List[dict] = []
+        counter = iter(range(total))
+        running = True
+
+        async def sample_memory() -> None:
+            nonlocal peak_rss
+            while running:
+                current = rss_mb(pid)
+                if current is not None and (peak_rss is None or current > peak_rss):
+                    peak_rss = current
+                await asyncio.sleep(0.05)
+
+        async def worker() -> None:
+            for index in counter:
+                samples.append(await one_request(client, endpoint, index))
+
+        sampler = asyncio.create_task(sample_memory())
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+        running = False
+        await sampler
+
+    latencies = [s["latency"] for s in samples if s["ok"]]
+    ttfes = [s["ttfe"] for s in samples if s["ok"] and s["ttfe"] is not None]
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000, 2)
+
+    memory_per_stream = None
+    if endpoint == "stream" and baseline_rss is not None and peak_rss is not None:
+        memory_per_stream = round((peak_rss - baseline_rss) * 1024 / concurrency, 1)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s["ok"]),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "latency_ms": {q: ms(percentile(latencies, v)) for q, v in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "ttfe_ms": {q: ms(percentile(ttfes, v)) for q, v in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "rss_baseline_mb": None if baseline_rss is None else round(baseline_rss, 1),
+        "rss_peak_mb": None if peak_rss is None else round(peak_rss, 1),
+        "memory_per_stream_kb": memory_per_stream,
+    }
+
+
+def summary_line(result: dict) -> str:
+    line = (
+        f"{result['endpoint']:>11} c={result['concurrency']:<4} chunk={result['chunk_size']:<3} "
+        f"delay={result['delay_ms']:<4} rps={result['throughput_rps']:<8} "
+        f"p50={result['latency_ms']['p50']}ms p95={result['latency_ms']['p95']}ms "
+        f"p99={result['latency_ms']['p99']}ms"
+    )
+    if result["endpoint"] == "stream":
+        line += (
+            f" ttfe_p50={result['ttfe_ms']['p50']}ms ttfe_p95={result['ttfe_ms']['p95']}ms"
+            f" mem/stream={result['memory_per_stream_kb']}KB"
+        )
+    return f"{line} errors={result['errors']}"
+
+
+def result_key(result: dict) -> tuple:
+    return (result["endpoint"], result["concurrency"], result["chunk_size"], result["delay_ms"])
+
+
+def compare(results: List[dict], baseline_path: str, tolerance: float) -> List[str]:
+    """Describe every metric that regressed by more than ``tolerance`` (a fraction)"""
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get(result_key(result))
+        if before is None:
+            continue
+        label = "{} c={} chunk={} delay={}ms".format(*result_key(result))
+        if result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: throughput {before['throughput_rps']} -> {result['throughput_rps']} rps"
+            )
+        for metric in ("latency_ms", "ttfe_ms"):
+            old, new = before[metric].get("p95"), result[metric].get("p95")
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{label}: {metric} p95 {old} -> {new}")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=parse_ints, default=[1, 8, 32])
+    parser.add_argument("--chunk-sizes", type=parse_ints, default=[2, 8])
+    parser.add_argument("--delays", type=parse_ints, default=[0, 50])
+    parser.add_argument("--requests", type=int, default=200, help="requests per level")
+    parser.add_argument("--endpoints", default="completions,stream")
+    parser.add_argument("--stub-latency-ms", type=int, default=50)
+    parser.add_argument("--stub-tokens-per-second", type=float, default=0)
+    parser.add_argument("--stub-tokens", type=int, default=200)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    stub_env = {
+        "STUB_FIRST_TOKEN_LATENCY_MS": str(args.stub_latency_ms),
+        "STUB_TOKENS_PER_SECOND": str(args.stub_tokens_per_second),
+        "STUB_OUTPUT_TOKENS": str(args.stub_tokens),
+    }
+    results = []
+    first_config = True
+    for chunk_size in args.chunk_sizes:
+        for delay_ms in args.delays:
+            # Chunking and delay only affect streams; completions are measured once
+            config_endpoints = [e for e in endpoints if e == "stream" or first_config]
+            first_config = False
+            if not config_endpoints:
+                continue
+            port = free_port()
+            server = start_server(
+                port,
+                {
+                    **stub_env,
+                    "STREAMING_PACING_MODE": "typed",
+                    "STREAMING_CHUNK_SIZE": str(chunk_size),
+                    "STREAMING_DELAY_MS": str(delay_ms),
+                },
+            )
+            try:
+                for endpoint in config_endpoints:
+                    for concurrency in args.concurrency:
+                        result = asyncio.run(
+                            run_level(
+                                f"http://127.0.0.1:{port}", server.pid, endpoint,
+                                concurrency, args.requests,
+                            )
+                        )
+                        result.update(
+                            endpoint=endpoint, concurrency=concurrency,
+                            chunk_size=chunk_size, delay_ms=delay_ms,
+                        )
+                        results.append(result)
+                        print(summary_line(result))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "git_commit": git_commit(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "requests_per_level": args.requests,
+                    "stub": stub_env,
+                },
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Exercise the retry, deadline, hedging and circuit breaker paths of GeminiService
+against the fake model. Run from the backend directory:
+
+    python -m benchmarks.resilience_scenarios
+"""
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("STREAMING_PACING_MODE", "passthrough")
+
+from google.api_core import exceptions as google_exceptions  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.exceptions import GeminiServiceException  # noqa: E402
+from app.services.gemini_service import GeminiService  # noqa: E402
+from app.services.resilience import CircuitBreaker, Resilience  # noqa: E402
+from benchmarks.fake_gemini import FakeBehaviour, install  # noqa: E402
+
+
+def make_resilience(**overrides) -> Resilience:
+    options = dict(
+        max_attempts=3,
+        backoff_base=0.01,
+        backoff_max=0.05,
+        breaker=CircuitBreaker(failure_threshold=0, reset_seconds=1.0),
+    )
+    options.update(overrides)
+    return Resilience(**options)
+
+
+async def complete(service: GeminiService) -> str:
+    started_at = time.perf_counter()
+    try:
+        await service.chat_completion("Summarize this.", use_cache=False)
+        outcome = "ok"
+    except GeminiServiceException as e:
+        outcome = f"{e.status_code}"
+    return f"{outcome} in {(time.perf_counter() - started_at) * 1000:.0f}ms"
+
+
+async def stream(service: GeminiService) -> str:
+    started_at = time.perf_counter()
+    chunks = 0
+    try:
+        async for _ in service.chat_completion_stream("Summarize this.", use_cache=False):
+            chunks += 1
+        outcome = "ok"
+    except GeminiServiceException as e:
+        outcome = f"{e.status_code}"
+    return f"{outcome} after {chunks} chunks in {(time.perf_counter() - started_at) * 1000:.0f}ms"
+
+
+async def latencies(service: GeminiService, calls: int) -> list:
+    results = []
+    for _ in range(calls):
+        started_at = time.perf_counter()
+        await service.chat_completion("Summarize this.", use_cache=False)
+        results.append(time.perf_counter() - started_at)
+    return sorted(results)
+
+
+async def main():
+    service = GeminiService()
+
+    behaviour = install(
+        FakeBehaviour(
+            fail_next=[
+                google_exceptions.ServiceUnavailable("injected"),
+                google_exceptions.InternalServerError("injected"),
+            ]
+        )
+    )
+    service.resilience = make_resilience()
+    print(f"transient errors, 3 attempts:   {await complete(service)} ({behaviour.calls} calls)")
+
+    behaviour = install(FakeBehaviour(fail_next=[google_exceptions.InvalidArgument("bad")]))
+    print(f"non-retryable error:            {await complete(service)} ({behaviour.calls} calls)")
+
+    behaviour = install(FakeBehaviour(latency=2.0))
+    settings.GEMINI_CALL_TIMEOUT_SECONDS = 0.3
+    print(f"deadline 300ms, upstream 2s:    {await complete(service)} ({behaviour.calls} calls)")
+    settings.GEMINI_CALL_TIMEOUT_SECONDS = 120.0
+
+    behaviour = install(FakeBehaviour(error_rate=1.0))
+    service.resilience = make_resilience(
+        max_attempts=1, breaker=CircuitBreaker(failure_threshold=3, reset_seconds=0.5)
+    )
+    outcomes = [await complete(service) for _ in range(5)]
+    print(f"circuit breaker (3 failures):   {outcomes} ({behaviour.calls} calls)")
+    behaviour.error_rate = 0.0
+    await asyncio.sleep(0.6)
+    print(f"after reset, trial call:        {await complete(service)}")
+
+    behaviour = install(
+        FakeBehaviour(fail_next=[google_exceptions.TooManyRequests("injected")] * 6)
+    )
+    service.resilience = make_resilience(
+        max_attempts=2, breaker=CircuitBreaker(failure_threshold=3, reset_seconds=0.5)
+    )
+    outcomes = [await complete(service) for _ in range(3)]
+    print(
+        f"rate limited (429), breaker 3:  {outcomes} ({behaviour.calls} calls, "
+        f"circuit {service.resilience.breaker.state})"
+    )
+
+    behaviour = install(FakeBehaviour(stall_after_chunks=1))
+    settings.GEMINI_STREAM_IDLE_TIMEOUT_SECONDS = 0.3
+    print(f"stream stalls after 1 chunk:    {await stream(service)}")
+    behaviour.release()
+    settings.GEMINI_STREAM_IDLE_TIMEOUT_SECONDS = 30.0
+
+    for hedge_enabled in (False, True):
+        install(FakeBehaviour(latency=0.02, slow_ratio=0.05, slow_latency=0.5))
+        service.resilience = make_resilience(hedge_enabled=hedge_enabled, hedge_min_delay=0.03)
+        # Warm the latency window first; only the calls after it are measured
+        await latencies(service, service.resilience.hedge_min_samples)
+        samples = await latencies(service, 300)
+        print(
+            f"tail latency, hedging={str(hedge_enabled):<5}  "
+            f"p50={statistics.median(samples) * 1000:.0f}ms "
+            f"p99={samples[int(len(samples) * 0.99)] * 1000:.0f}ms "
+            f"max={samples[-1] * 1000:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
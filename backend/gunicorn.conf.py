@@ -0,0 +1,81 @@
+"""Production server profile: ``gunicorn -c gunicorn.conf.py app.main:app``
+
+The app (and, for the Gemini backend, the SDK) is imported once in the master and
+shared copy-on-write by the forked workers. Per-worker state such as the Gemini
+client, its thread pool and network connections is built after the fork by the
+warm-up in ``lifespan``; /api/v1/health/ready answers 503 until that has finished.
+"""
+import math
+import os
+import tempfile
+
+from app.core.config import settings
+
+
+def _cgroup_cpu_limit():
+    """CPUs allowed by the container's cgroup quota, or None when unlimited"""
+    try:
+        # cgroup v2: "<quota> <period>", quota is "max" when unlimited
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1: quota is -1 when unlimited
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def _cpu_count() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        # A 1.5 CPU quota still gets two workers; the quota caps them together
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return cpus
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = settings.SERVER_WORKERS or _cpu_count()
+worker_class = "app.core.server.ProductionWorker"
+preload_app = True
+graceful_timeout = int(settings.SERVER_DRAIN_SECONDS) + 10
+keepalive = 5
+accesslog = None
+loglevel = settings.LOG_LEVEL.lower()
+
+# prometheus_client picks its storage when first imported, so the shared metrics
+# directory has to exist before the app is preloaded
+if workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+
+def on_starting(server):
+    server.log.info(f"Starting {workers} worker(s) ({worker_class})")
+    if workers > 1 and settings.CONVERSATION_STORE_BACKEND == "memory":
+        server.log.warning(
+            "CONVERSATION_STORE_BACKEND=memory keeps conversations per worker; "
+            "use sqlite to share them"
+        )
+    # Import only: channels and threads must not be created before the fork
+    from app.services.backend import backend_class
+
+    backend_class()
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
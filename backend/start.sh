@@ -31,5 +31,11 @@ echo "📚 API Documentation: http://localhost:8000/docs"
 echo "🏥 Health Check: http://localhost:8000/api/v1/health"
 echo ""
 
+# Production profile: preloaded gunicorn master with uvloop/httptools workers
+if [ "$1" = "--production" ]; then
+    echo "🏭 Production mode (workers: SERVER_WORKERS, default one per CPU)"
+    exec gunicorn -c gunicorn.conf.py app.main:app
+fi
+
 # Start the server
 uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
\ No newline at end of file
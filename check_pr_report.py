@@ -0,0 +1,104 @@
+"""Offline check of daily_check_prs.py against the synthetic GitHub responses in
+fixtures/github, with Slack replaced by a list:
+
+    python check_pr_report.py
+
+The fixtures are hand-written test data in the ``--record-fixtures`` file format,
+not a recording of the real repository: eight made-up PRs merged around May 2024,
+with only the fields the report reads (``pulls/N`` carries just the head SHA).
+They were written through the recorder against a local stand-in server, so edit or
+regenerate them the same way when the requests change.
+
+Runs two overlapping backfills, a repeat of the second one and an incremental run
+from the checkpoint, and checks which PRs each run posts and what the checkpoint
+holds afterwards. Exits non-zero if anything differs.
+"""
+import os
+import sys
+import tempfile
+
+WORK_DIR = tempfile.mkdtemp(prefix="pr-report-check-")
+os.environ.update(
+    GITHUB_TOKEN="fixtures",
+    GITHUB_FIXTURES=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "github"),
+    PR_REPORT_STATE=os.path.join(WORK_DIR, "state.json"),
+    PR_REPORT_CACHE=os.path.join(WORK_DIR, "etags.json"),
+    PR_SUMMARY_CACHE=os.path.join(WORK_DIR, "summaries.json"),
+    PR_DIGEST="",
+)
+
+import daily_check_prs  # noqa: E402
+
+posted = []
+daily_check_prs.send_to_slack = posted.append
+failures = []
+
+
+def check(condition, description):
+    print(f"{'✅' if condition else '❌'} {description}")
+    if not condition:
+        failures.append(description)
+
+
+def run(*argv):
+    """Run the report with ``argv``; returns ``(exit code, PR numbers posted)``"""
+    sys.argv = ["daily_check_prs.py", *argv]
+    del posted[:]
+    try:
+        daily_check_prs.main()
+        code = 0
+    except SystemExit as e:
+        code = e.code
+    numbers = []
+    for message in posted:
+        for block in message.get("blocks", []):
+            text = block.get("text", {}).get("text", "")
+            if block["type"] == "section":
+                numbers.append(int(text.split("/pull/")[1].split("|")[0]))
+    return code, numbers
+
+
+def main():
+    # #107 merged before the window (only updated inside it), #103 was closed unmerged
+    code, numbers = run("--since", "2024-05-01", "--until", "2024-05-15")
+    check(code == 0 and numbers == [101, 102, 104], f"first backfill posts #101 #102 #104: {numbers}")
+    state = daily_check_prs.ReportState()
+    check(
+        daily_check_prs.format_time(state.last_merged_at) == "2024-05-12T15:00:00Z",
+        "checkpoint moves to the newest merge reported",
+    )
+
+    code, numbers = run("--since", "2024-05-10", "--until", "2024-05-31")
+    check(code == 0 and numbers == [105, 106], f"overlapping backfill skips #104: {numbers}")
+
+    code, numbers = run("--since", "2024-05-10", "--until", "2024-05-31")
+    check(
+        code == 0 and numbers == [] and "No PR activity" in posted[0]["text"],
+        "repeating a backfill posts nothing new",
+    )
+
+    code, numbers = run()
+    check(code == 0 and numbers == [108], f"incremental run from the checkpoint posts #108: {numbers}")
+    state = daily_check_prs.ReportState()
+    check(
+        sorted(map(int, state.reported)) == [101, 102, 104, 105, 106, 108],
+        "every posted PR is recorded once",
+    )
+
+    code, _ = run("--since", "2024-05-01", "--until", "2024-05-15", "--dry-run")
+    check(code == 0 and posted == [], "a dry run posts nothing")
+
+    code, _ = run("--until", "2024-05-15")
+    check(code == 2, "--until without --since is rejected")
+
+    code, _ = run("--since", "2023-01-01")
+    check(code == 1, "a failed run exits non-zero")
+
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        sys.exit(1)
+    print("All checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,563 @@
+"""Post the PRs merged since the last report to Slack.
+
+Progress is checkpointed in PR_REPORT_STATE, so a daily run only looks at PRs
+updated since the newest merge it already reported, and no PR is posted twice:
+
+    python daily_check_prs.py                                   # new merges since the checkpoint
+    python daily_check_prs.py --since 2024-05-01 --until 2024-05-31   # backfill a range
+    python daily_check_prs.py --dry-run                         # print instead of posting
+
+GitHub responses can be recorded with ``--record-fixtures DIR`` and replayed offline
+by setting ``GITHUB_FIXTURES=DIR`` (use ``--since``/``--until`` for a repeatable window).
+``fixtures/github`` holds synthetic responses in that format (eight made-up PRs in
+May 2024, with only the fields this script reads) that ``check_pr_report.py``
+replays to check backfills, the checkpoint and duplicate suppression offline.
+
+With ``--digest api`` (or ``PR_DIGEST=api``) each PR is posted with a short summary
+generated by the backend's ``POST /api/v1/chat/batch`` at SUMMARY_API_URL instead of
+its raw last comment; ``--digest local`` runs the same batch in-process through the
+backend's service layer, and with ``LLM_BACKEND=stub`` works offline:
+
+    LLM_BACKEND=stub GITHUB_FIXTURES=fixtures/github python daily_check_prs.py \\
+        --digest local --since 2024-05-01 --until 2024-05-31 --dry-run
+"""
+import argparse
+import asyncio
+import hashlib
+import json
 import os
 import re
+import sys
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 REPO_URL = "biancassilva/smart-summary-app"
+API_URL = os.getenv("GITHUB_API_URL") or "https://api.github.com"
+# ETag cache reused across runs (the workflow restores it with actions/cache)
+CACHE_PATH = os.getenv("PR_REPORT_CACHE") or ".cache/github-etags.json"
+CACHE_MAX_AGE_DAYS = 7
+MAX_WORKERS = int(os.getenv("PR_REPORT_WORKERS") or 8)
+# Checkpoint of reported PRs, kept next to the ETag cache
+STATE_PATH = os.getenv("PR_REPORT_STATE") or ".cache/pr-report-state.json"
+# Directory of recorded GitHub responses to replay instead of calling the API
+FIXTURES_DIR = os.getenv("GITHUB_FIXTURES")
+SLACK_MAX_BLOCKS = 50  # Slack rejects messages with more blocks
+COMMENT_MAX_CHARS = 2500  # Section text is capped at 3000 characters, leave room for the PR line
+# PR digest: "" posts the raw last comment, "api" summarizes through the backend's
+# HTTP API, "local" through its service layer (LLM_BACKEND=stub runs offline).
+# The workflow passes unset variables as empty strings, hence "or" for the defaults.
+PR_DIGEST = os.getenv("PR_DIGEST") or ""
+SUMMARY_API_URL = os.getenv("SUMMARY_API_URL") or "http://localhost:8000"
+# Summaries keyed by PR head SHA, so an unchanged PR is never summarized twice
+SUMMARY_CACHE_PATH = os.getenv("PR_SUMMARY_CACHE") or ".cache/pr-summaries.json"
+DIGEST_DESCRIPTION_MAX_CHARS = 8000
+DIGEST_MAX_TOKENS = 400
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+# Markdown/HTML tokens removed or unwrapped by clean_text, matched in a single scan.
+# Every alternative starts with a literal character, so the regex engine can skip
+# plain text with a fast first-character check; the kind of a match is read from its
+# first character. Fences and headings include the newline before them.
+_TOKENS = re.compile(
+    r"\n[ \t]*(`{3,}|~{3,})[^\n]*\n(?:.*?\n[ \t]*\1[ \t]*(?=\n|\Z)|.*\Z)"  # fenced code
+    r"|\n[ \t]*#{1,6}[ \t]+"  # heading marker
+    r"|<!--.*?(?:-->|\Z)"  # HTML comment
+    r"|<(https?://[^>\s]+)>"  # autolink
+    r"|</?[A-Za-z][^>]*>"  # HTML tag
+    r"|`([^`\n]+)`"  # inline code
+    r"|\[([^\]\n]*)\]\([^)\n]*\)"  # link
+    r"|!\[([^\]\n]*)\]\([^)\n]*\)"  # image
+    r"|Changelog",
+    re.DOTALL,
+)
+# Emphasis markers opening before a word or closing after one; "2 * 3", "* item" and
+# snake_case survive. The lookbehinds follow the marker to keep the literal prefix.
+_EMPHASIS = re.compile(
+    "|".join(
+        rf"{marker}(?<![\w*_]{marker})(?=[^\s*_])|{marker}(?<=[^\s*_]{marker})(?![\w*_])"
+        for marker in (r"\*\*\*", r"\*\*", r"\*", "___", "__", "_")
+    )
+)
+# Characters any token or emphasis marker needs; text without them is already plain
+_MARKUP = re.compile(r"[<`\[*_~#]|Changelog")
+_LIMIT_SLACK = 64  # Extra input read past the limit to make up for removed markers
+_BLANK_LINES = re.compile(r"\n[ \t]*\n(?:[ \t]*\n)+")
 
 HEADERS = {
     "Authorization": f"token {GITHUB_TOKEN}",
     "Accept": "application/vnd.github.v3+json",
 }
 
-# Set time window: 18:00 UTC yesterday to 18:00 UTC today (24 hours)
+# Window without a checkpoint: 18:00 UTC yesterday to 18:00 UTC today (24 hours)
 TODAY = datetime.now(timezone.utc).date()
 END_OF_DAY = datetime.combine(TODAY, datetime.min.time()).replace(tzinfo=timezone.utc, hour=18)
 START_OF_DAY = END_OF_DAY - timedelta(hours=24)
 
 
-def get_prs(state):
-    """Fetch PRs by state (open, closed, all)"""
-    url = f"https://api.github.com/repos/{REPO_URL}/pulls"
-    params = {"state": state, "per_page": 100}
-    response = requests.get(url, headers=HEADERS, params=params)
-    response.raise_for_status()
-    return response.json()
-
-
-def clean_text(text):
-    """Remove markdown and HTML tags from text"""
-    # Remove everything from Changelog onwards
-    text = re.sub(r'Changelog[\s\S]*$', '', text)
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    # Remove markdown bold/italic (**text**, __text__, *text*, _text_)
-    text = re.sub(r'[*_]{1,2}([^*_]+)[*_]{1,2}', r'\1', text)
-    # Remove markdown links [text](url)
-    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
-    # Remove markdown code blocks and inline code
-    text = re.sub(r'```[\s\S]*?```', '', text)
-    text = re.sub(r'`([^`]+)`', r'\1', text)
-    # Remove markdown headers
-    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
-    return text.strip()
-
-
-def get_last_comment(pr_number):
-    """Fetch the last comment from a PR"""
-    url = f"https://api.github.com/repos/{REPO_URL}/issues/{pr_number}/comments"
-    response = requests.get(url, headers=HEADERS)
-    response.raise_for_status()
-    comments = response.json()
+class GitHubClient:
+    """Pooled GitHub API session with concurrent fetches and ETag revalidation.
+
+    Responses are stored in a JSON file with their ETag. Later runs send
+    ``If-None-Match`` and reuse the stored body on ``304 Not Modified``, which GitHub
+    does not count against the rate limit.
+
+    With ``fixtures_dir`` set, responses are replayed from recorded files instead
+    (or, with ``record=True``, fetched live and written there).
+    """
+
+    def __init__(
+        self, cache_path=CACHE_PATH, max_workers=MAX_WORKERS, fixtures_dir=FIXTURES_DIR, record=False
+    ):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.cache_path = cache_path
+        self.cache = self._load_cache()
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0}
+        self.rate_limit_remaining = None
+        self.fixtures_dir = fixtures_dir
+        self.record = record
+
+    def _fixture_path(self, url):
+        # Keyed by path and query only, so recordings replay against any API host
+        parts = urlsplit(url)
+        key = hashlib.sha1(f"{parts.path}?{parts.query}".encode()).hexdigest()
+        return os.path.join(self.fixtures_dir, f"{key}.json")
+
+    def _replay(self, url):
+        path = self._fixture_path(url)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recorded GitHub response for {url}")
+        with open(path) as f:
+            fixture = json.load(f)
+        with self.lock:
+            self.stats["requests"] += 1
+        return fixture["body"], fixture["links"]
+
+    def _store_fixture(self, url, body, links):
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        with open(self._fixture_path(url), "w") as f:
+            json.dump({"url": url, "body": body, "links": links}, f, indent=1)
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        """Write entries used within CACHE_MAX_AGE_DAYS back to disk"""
+        cutoff = time.time() - CACHE_MAX_AGE_DAYS * 86400
+        with self.lock:
+            entries = {url: entry for url, entry in self.cache.items() if entry["used"] >= cutoff}
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path, "w") as f:
+            json.dump(entries, f)
+
+    def get(self, url, params=None):
+        """Return ``(json, links)`` for a GET, revalidating a cached copy when present"""
+        if params:
+            url = requests.Request("GET", url, params=params).prepare().url
+        if self.fixtures_dir and not self.record:
+            return self._replay(url)
+        with self.lock:
+            cached = self.cache.get(url)
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+
+        response = self.session.get(url, headers=headers, timeout=30)
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        with self.lock:
+            self.stats["requests"] += 1
+            if remaining is not None:
+                self.rate_limit_remaining = remaining
+            if response.status_code == 304 and cached:
+                self.stats["not_modified"] += 1
+                cached["used"] = time.time()
+                body, links = cached["body"], cached["links"]
+            else:
+                body = links = None
+
+        if body is None:
+            response.raise_for_status()
+            body = response.json()
+            links = {rel: link["url"] for rel, link in response.links.items()}
+            etag = response.headers.get("ETag")
+            if etag:
+                with self.lock:
+                    self.cache[url] = {
+                        "etag": etag, "body": body, "links": links, "used": time.time()
+                    }
+        if self.record:
+            self._store_fixture(url, body, links)
+        return body, links
+
+    def paginate(self, url, params=None):
+        """Yield items from every page, following ``Link: rel="next"``"""
+        while url:
+            page, links = self.get(url, params)
+            yield from page
+            url, params = links.get("next"), None
+
+    def map(self, fn, items):
+        """Run ``fn`` over ``items`` concurrently, preserving order"""
+        return list(self.executor.map(fn, items))
+
+    def close(self):
+        self.executor.shutdown()
+        self.session.close()
+
+
+def parse_time(value):
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+def format_time(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class ReportState:
+    """Checkpoint of what has been posted to Slack.
+
+    ``last_merged_at`` is the newest merge reported so far and starts the next
+    incremental window. ``reported`` maps PR numbers to the merge time and comment id
+    that were posted, so reruns and overlapping backfills never post a PR twice.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        last_merged_at = data.get("last_merged_at")
+        self.last_merged_at = parse_time(last_merged_at) if last_merged_at else None
+        self.reported = data.get("reported", {})
+
+    def is_reported(self, pr):
+        return str(pr["number"]) in self.reported
+
+    def record(self, prs):
+        for pr in prs:
+            self.reported[str(pr["number"])] = {
+                "merged_at": pr["merged_at"],
+                "comment_id": pr.get("last_comment_id"),
+            }
+            merged_at = parse_time(pr["merged_at"])
+            if self.last_merged_at is None or merged_at > self.last_merged_at:
+                self.last_merged_at = merged_at
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            "last_merged_at": format_time(self.last_merged_at) if self.last_merged_at else None,
+            "reported": self.reported,
+        }
+        # Write then rename, so an interrupted run never leaves a truncated checkpoint
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+class SummaryCache:
+    """PR digests from earlier runs, keyed by the PR head SHA.
+
+    A PR whose head has not moved gets its stored summary back without another
+    summarization call. Entries not used within CACHE_MAX_AGE_DAYS are dropped on save.
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_PATH):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, sha):
+        entry = self.entries.get(sha)
+        if entry is None:
+            return None
+        entry["used"] = time.time()
+        return entry["summary"]
+
+    def put(self, sha, summary):
+        self.entries[sha] = {"summary": summary, "used": time.time()}
+
+    def save(self):
+        cutoff = time.time() - CACHE_MAX_AGE_DAYS * 86400
+        entries = {sha: entry for sha, entry in self.entries.items() if entry["used"] >= cutoff}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(entries, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+def report_window(state, since=None, until=None):
+    """Return ``(start, end, label)`` of the merges to report.
+
+    An explicit ``since`` backfills that range; otherwise the window starts at the
+    checkpoint, or covers the last 24 hours (18:00 UTC) on the first run.
+    """
+    now = datetime.now(timezone.utc)
+    if since:
+        end = until or now
+        return since, end, f"between {since:%Y-%m-%d %H:%M} and {end:%Y-%m-%d %H:%M} UTC"
+    if state.last_merged_at:
+        return state.last_merged_at, now, f"since {state.last_merged_at:%Y-%m-%d %H:%M} UTC"
+    return START_OF_DAY, END_OF_DAY, "in the last 24 hours (18:00 UTC)"
+
+
+def get_merged_prs(client, start, end):
+    """Fetch PRs merged between ``start`` and ``end``, oldest merge first.
+
+    The issues listing supports ``since`` (unlike the pulls listing) and carries
+    ``pull_request.merged_at``, so one paginated query covers the window; a PR merged
+    inside it was also updated after ``start``.
+    """
+    url = f"{API_URL}/repos/{REPO_URL}/issues"
+    params = {
+        "state": "closed",
+        "sort": "updated",
+        "direction": "asc",
+        "since": format_time(start),
+        "per_page": 100,
+    }
+    merged = []
+    for issue in client.paginate(url, params):
+        merged_at = (issue.get("pull_request") or {}).get("merged_at")
+        if merged_at and start <= parse_time(merged_at) <= end:
+            issue["merged_at"] = merged_at
+            merged.append(issue)
+    return sorted(merged, key=lambda pr: pr["merged_at"])
+
+
+def _strip_emphasis(text):
+    if "*" not in text and "_" not in text:
+        return text
+    return _EMPHASIS.sub("", text)
+
+
+def clean_text(text, limit=COMMENT_MAX_CHARS):
+    """Convert a markdown/HTML comment to plain text for Slack.
+
+    One left-to-right scan with a precompiled token pattern: fenced code blocks and
+    HTML comments are dropped whole (so markers inside code never leak into the
+    output), inline code, link texts and image alt texts are kept, tags, heading
+    markers and emphasis markers are removed, and everything from ``Changelog`` on
+    is cut. The scan stops as soon as ``limit`` characters are produced, so long
+    bodies are never read to the end. Short comments without any markup character
+    (most review comments) skip the scan.
+    """
+    if len(text) <= limit and _MARKUP.search(text) is None:
+        return _BLANK_LINES.sub("\n\n", "\n" + text).strip()
+    # Fences and headings are matched from the newline before them
+    text = "\n" + text
+    parts = []
+    size = 0
+    pos = 0
+    truncated = False
+    for match in _TOKENS.finditer(text):
+        start, stop = match.span()
+        # Plain text up to the token, never more than the output can still take
+        end = min(start, pos + limit - size + _LIMIT_SLACK)
+        piece = _strip_emphasis(text[pos:end])
+        first = text[start]
+        if first == "C" or end < start:  # Changelog, or the limit is reached
+            parts.append(piece)
+            truncated = end < start
+            break
+        if first == "\n":
+            if match.group(1) is None:  # Heading: keep the line break, drop the marker
+                piece += "\n"
+        elif first == "<":
+            if match.group(2) is not None:  # Autolink
+                piece += match.group(2)
+        elif first == "`":
+            piece += match.group(3)
+        elif first == "[":
+            piece += _strip_emphasis(match.group(4))
+        elif first == "!":
+            piece += _strip_emphasis(match.group(5))
+        parts.append(piece)
+        size += len(piece)
+        pos = stop
+        if size >= limit:
+            truncated = pos < len(text)
+            break
+    else:
+        parts.append(_strip_emphasis(text[pos:pos + limit - size + _LIMIT_SLACK]))
+
+    cleaned = _BLANK_LINES.sub("\n\n", "".join(parts)).strip()
+    if truncated or len(cleaned) > limit:
+        cleaned = cleaned[:limit].rstrip() + "…"
+    return cleaned
+
+
+def get_last_comment(client, pr_number):
+    """Fetch the last comment from a PR as ``(comment_id, text)``"""
+    url = f"{API_URL}/repos/{REPO_URL}/issues/{pr_number}/comments"
+    comments, links = client.get(url, {"per_page": 100})
+    # Comments are oldest first; the newest is on the last page
+    if "last" in links:
+        comments, _ = client.get(links["last"])
     if comments:
         comment_text = comments[-1].get("body", "")
-        return clean_text(comment_text)
-    return ""
+        return comments[-1]["id"], clean_text(comment_text)
+    return None, ""
+
 
+def get_head_sha(client, pr_number):
+    pr, _ = client.get(f"{API_URL}/repos/{REPO_URL}/pulls/{pr_number}")
+    return pr["head"]["sha"]
 
-def categorize_prs():
-    """Return merged PRs between 00:00 UTC and 23:59 UTC today."""
-    closed_prs = get_prs("closed")
-    recent_merged = []
 
-    # Check closed PRs for merged status
-    for pr in closed_prs:
-        # Fetch full PR details to check for merge
-        details = requests.get(pr["url"], headers=HEADERS).json()
-        merged_at = details.get("merged_at")
+def digest_item(pr):
+    """Batch item asking for a short summary of one PR"""
+    parts = [
+        "Summarize this merged pull request in 2-3 sentences for a team changelog: "
+        "what changed and why.",
+        f"Title: {pr['title']}",
+        f"Author: {pr['user']['login']}",
+    ]
+    description = clean_text(pr.get("body") or "", DIGEST_DESCRIPTION_MAX_CHARS)
+    if description:
+        parts.append(f"Description:\n{description}")
+    if pr.get("last_comment"):
+        parts.append(f"Last comment:\n{pr['last_comment']}")
+    return {
+        "id": str(pr["number"]),
+        "message": "\n\n".join(parts),
+        "content_type": "document",
+        "max_tokens": DIGEST_MAX_TOKENS,
+    }
+
+
+def summarize_api(items):
+    """Summarize ``items`` with one call to the backend's batch endpoint; returns
+    ``{id: summary}`` for the items that succeeded"""
+    response = requests.post(
+        f"{SUMMARY_API_URL.rstrip('/')}/api/v1/chat/batch",
+        json={"items": items},
+        stream=True,
+        timeout=(10, 600),
+    )
+    response.raise_for_status()
+    summaries = {}
+    with response:
+        # NDJSON, one result per line in completion order
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            if result["success"]:
+                summaries[result["id"]] = result["response"]
+            else:
+                print(f"⚠️ Summary of PR #{result['id']} failed: {result['error']['message']}")
+    return summaries
+
+
+def summarize_local(items):
+    """Summarize ``items`` in-process with the backend's batch runner and the backend
+    selected by LLM_BACKEND; returns ``{id: summary}`` for the items that succeeded"""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from app.core.config import settings
+    from app.schemas.chat import BatchChatItem
+    from app.services.backend import build_backend
+    from app.services.batch import run_batch
+
+    async def run():
+        backend = build_backend()
+        summaries = {}
+        async for result in run_batch(
+            backend,
+            [BatchChatItem(**item) for item in items],
+            settings.BATCH_CONCURRENCY,
+            settings.BATCH_ITEM_TIMEOUT_SECONDS,
+        ):
+            if result.success:
+                summaries[result.id] = result.response
+            else:
+                print(f"⚠️ Summary of PR #{result.id} failed: {result.error['message']}")
+        return summaries
+
+    return asyncio.run(run())
+
 
-        if merged_at:
-            merged_time = datetime.strptime(merged_at, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
-            if START_OF_DAY <= merged_time <= END_OF_DAY:
-                recent_merged.append(details)
+def add_summaries(client, prs, mode):
+    """Set ``pr["summary"]`` from the SHA cache, summarizing the rest in one batch.
 
-    print(f"🔍 Found {len(recent_merged)} merged PRs in the last 24 hours (18:00 UTC)")
+    PRs whose summary fails keep their raw last comment.
+    """
+    cache = SummaryCache()
+    shas = client.map(lambda pr: get_head_sha(client, pr["number"]), prs)
+    missing = []
+    for pr, sha in zip(prs, shas):
+        pr["summary"] = cache.get(sha)
+        if pr["summary"] is None:
+            missing.append((pr, sha))
+
+    summarized = 0
+    if missing:
+        summarize = summarize_local if mode == "local" else summarize_api
+        try:
+            summaries = summarize([digest_item(pr) for pr, _ in missing])
+        except Exception as e:
+            print(f"⚠️ PR digest failed, posting raw comments: {e}")
+            summaries = {}
+        for pr, sha in missing:
+            summary = summaries.get(str(pr["number"]))
+            if summary:
+                pr["summary"] = clean_text(summary)
+                cache.put(sha, pr["summary"])
+                summarized += 1
+    cache.save()
+    print(
+        f"🧠 PR digest: {len(prs) - len(missing)} cached, {summarized} summarized, "
+        f"{len(missing) - summarized} failed"
+    )
+
+
+def categorize_prs(client, state, start, end, label):
+    """Return PRs merged inside the window that were not reported yet, with their
+    last comment.
+
+    The listing already carries the merge time, so no per-PR detail requests are
+    needed; last comments are fetched concurrently.
+    """
+    recent_merged = [pr for pr in get_merged_prs(client, start, end) if not state.is_reported(pr)]
+    comments = client.map(lambda pr: get_last_comment(client, pr["number"]), recent_merged)
+    for pr, (comment_id, comment) in zip(recent_merged, comments):
+        pr["last_comment_id"] = comment_id
+        pr["last_comment"] = comment
+
+    print(f"🔍 Found {len(recent_merged)} new merged PRs {label}")
     return {
         "merged": recent_merged,
     }
@@ -88,7 +569,7 @@ def format_pr_section(title, prs, emoji):
     blocks = [{"type": "header", "text": {"type": "plain_text", "text": f"{emoji} {title}"}}]
     for pr in prs:
         status = "📝 Draft" if pr.get("draft") else "✅ Merged"
-        last_comment = get_last_comment(pr["number"])
+        last_comment = pr.get("summary") or pr.get("last_comment", "")
 
         text = (
             f"*<{pr['html_url']}|{pr['title']}>* by *{pr['user']['login']}*\n"
@@ -100,16 +581,24 @@ def format_pr_section(title, prs, emoji):
     return blocks
 
 
-def format_slack_message(summary):
-    blocks = []
+def format_slack_messages(summary, label):
+    """Return ``(message, prs)`` pairs; large reports are split to stay within
+    SLACK_MAX_BLOCKS, and each message lists the PRs it reports"""
+    messages = []
     for section, (emoji, title) in {
         "merged": ("🎉", "PRs Merged"),
     }.items():
-        blocks += format_pr_section(title, summary[section], emoji)
+        prs = summary[section]
+        # One header block, then two blocks per PR
+        per_message = (SLACK_MAX_BLOCKS - 1) // 2
+        for i in range(0, len(prs), per_message):
+            batch = prs[i:i + per_message]
+            heading = title if i == 0 else f"{title} (continued)"
+            messages.append(({"blocks": format_pr_section(heading, batch, emoji)}, batch))
 
-    if not blocks:
-        return {"text": "No PR activity in the last 24 hours 🚀"}
-    return {"blocks": blocks}
+    if not messages:
+        return [({"text": f"No PR activity {label} 🚀"}, [])]
+    return messages
 
 
 def send_to_slack(message):
@@ -117,14 +606,63 @@ def send_to_slack(message):
     response.raise_for_status()
 
 
+def parse_args():
+    def utc(value):
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--since", type=utc, help="Backfill merges from this UTC date/time")
+    parser.add_argument("--until", type=utc, help="End of the backfill range (default: now)")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the Slack messages; keep the checkpoint"
+    )
+    parser.add_argument("--record-fixtures", metavar="DIR", help="Save GitHub responses to DIR")
+    parser.add_argument(
+        "--digest",
+        choices=("api", "local"),
+        default=PR_DIGEST or None,
+        help="Post an LLM summary of each PR instead of its last comment",
+    )
+    args = parser.parse_args()
+    if args.until and not args.since:
+        parser.error("--until needs --since; incremental runs always end now")
+    return args
+
+
 def main():
+    args = parse_args()
+    state = ReportState()
+    if args.record_fixtures:
+        client = GitHubClient(fixtures_dir=args.record_fixtures, record=True)
+    else:
+        client = GitHubClient()
     try:
-        summary = categorize_prs()
-        slack_message = format_slack_message(summary)
-        send_to_slack(slack_message)
-        print("✅ Slack summary sent successfully.")
+        start, end, label = report_window(state, args.since, args.until)
+        summary = categorize_prs(client, state, start, end, label)
+        if args.digest and summary["merged"]:
+            add_summaries(client, summary["merged"], args.digest)
+        for slack_message, prs in format_slack_messages(summary, label):
+            if args.dry_run:
+                print(json.dumps(slack_message, indent=2, ensure_ascii=False))
+                continue
+            send_to_slack(slack_message)
+            # Checkpoint per message, so a failure later on never re-posts these PRs
+            state.record(prs)
+            state.save()
+        if not args.dry_run:
+            print("✅ Slack summary sent successfully.")
     except Exception as e:
         print(f"❌ Error: {e}")
+        # After the finally block, so the cache and the request stats are still written
+        sys.exit(1)
+    finally:
+        client.close()
+        client.save_cache()
+        print(
+            f"🌐 GitHub: {client.stats['requests']} requests, "
+            f"{client.stats['not_modified']} not modified, "
+            f"rate limit remaining: {client.rate_limit_remaining}"
+        )
 
 
 if __name__ == "__main__":